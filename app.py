@@ -1,8 +1,8 @@
 import streamlit as st
-from langchain_groq import ChatGroq
-from langchain.memory import ConversationBufferMemory
 import config
 from utils.helpers import get_response, process_function_call, generate_business_description
+from tools.product_tools import product_lookup_scope
+from utils.summary_memory import create_conversation_memory
 
 
 
@@ -20,7 +20,7 @@ st.markdown("Chat with our smart customer service agent in English or Pidgin Eng
 if "messages" not in st.session_state:
     st.session_state.messages = []
 if "memory" not in st.session_state:
-    st.session_state.memory = ConversationBufferMemory()
+    st.session_state.memory = create_conversation_memory()
 if "function_call_log" not in st.session_state:
     st.session_state.function_call_log = []
 if "business_description" not in st.session_state:
@@ -158,10 +158,10 @@ if prompt := st.chat_input("Type your message here..."):
     with st.chat_message("user"):
         st.markdown(prompt)
     
-    # Get AI response
-    with st.chat_message("assistant"):
+    # Get AI response (product lookups are shared by every tool this message runs)
+    with st.chat_message("assistant"), product_lookup_scope():
         with st.spinner("Thinking..."):
-            response_text, function_call, error = get_response(
+            response_text, function_call, result, detected_intent, error = get_response(
                 prompt,
                 api_key,
                 business_type,
@@ -187,10 +187,8 @@ if prompt := st.chat_input("Type your message here..."):
                         f"Intent: {function_call['intent']}\nParameters: {function_call['parameters']}"
                     )
                     
-                    # Show function call indicator
-                    with st.spinner(f"Executing: {function_call['intent']}..."):
-                        result = process_function_call(function_call)
-                        print(f"Function call result: {result}")
+                    # get_response already executed the function call; reuse its result
+                    print(f"Function call result: {result}")
                     
                     # Process function call result
                     if result and "Error" not in result:
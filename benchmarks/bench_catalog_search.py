@@ -0,0 +1,100 @@
+"""
+Benchmark product search on synthetic catalogs
+
+Compares the original nested-loop substring scan, the inverted CatalogIndex
+and the NumPy-backed VectorCatalog at 10k, 100k and 1M SKUs.
+
+Usage (from the repository root):
+    python benchmarks/bench_catalog_search.py [sizes...]
+    python benchmarks/bench_catalog_search.py 10000 100000
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.catalog_index import CatalogIndex
+from data.vector_catalog import VectorCatalog
+
+
+CATEGORIES = ["haircare", "skincare", "clothing", "gadgets", "groceries", "furniture", "jewelry", "pharmacy"]
+WORDS = [
+    "brazilian", "peruvian", "wig", "bundle", "oil", "serum", "vitamin", "cleanser", "moisturizer",
+    "designer", "jeans", "cotton", "shirt", "dress", "summer", "phone", "charger", "laptop", "stand",
+    "rice", "beans", "chair", "table", "ring", "necklace", "gold", "silver", "tablet", "capsule",
+    "organic", "premium", "classic", "mini", "deluxe", "travel", "kids", "men", "women", "pack"
+]
+QUERIES = ["peruvian wig", "vitamin c serum", "gold necklace", "cotton shirt", "premium laptop stand", "organic rice pack"]
+LEGACY_SCAN_MAX_SIZE = 100_000
+
+
+def make_catalog(size, seed=0):
+    """Generate a {category: [product, ...]} catalog with `size` products"""
+    rng = random.Random(seed)
+    catalog = {category: [] for category in CATEGORIES}
+    for i in range(size):
+        name = " ".join(rng.sample(WORDS, rng.randint(2, 4))).title() + f" {i}"
+        catalog[rng.choice(CATEGORIES)].append({
+            "id": f"p{i}",
+            "name": name,
+            "price": rng.randint(1_000, 500_000),
+            "stock": rng.randint(0, 50)
+        })
+    return catalog
+
+
+def legacy_scan(catalog, query):
+    """The original enhance_product_search_with_llm matching loop"""
+    matches = []
+    for category, products in catalog.items():
+        for product in products:
+            if any(word.lower() in product["name"].lower() for word in query.split()):
+                matches.append((category, product, 0.8))
+    return matches
+
+
+def time_queries(search, repeat):
+    """Return per-query latencies in milliseconds"""
+    latencies = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name, size, build_seconds, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    build = f"{build_seconds:8.2f}s" if build_seconds is not None else "       -"
+    print(f"{size:>9,}  {name:<14} build {build}   p50 {statistics.median(latencies):9.3f} ms   p95 {p95:9.3f} ms")
+
+
+def main(sizes):
+    print(f"{'SKUs':>9}  {'engine':<14} {'':>15}   {'query latency'}")
+    for size in sizes:
+        catalog = make_catalog(size)
+        repeat = 20 if size <= 100_000 else 5
+
+        if size <= LEGACY_SCAN_MAX_SIZE:
+            report("legacy scan", size, None, time_queries(lambda q: legacy_scan(catalog, q), max(1, repeat // 10)))
+
+        start = time.perf_counter()
+        index = CatalogIndex(catalog)
+        build_seconds = time.perf_counter() - start
+        report("CatalogIndex", size, build_seconds, time_queries(lambda q: index.search(q, limit=10), repeat))
+        del index
+
+        start = time.perf_counter()
+        vector_catalog = VectorCatalog(catalog)
+        build_seconds = time.perf_counter() - start
+        report("VectorCatalog", size, build_seconds, time_queries(lambda q: vector_catalog.search(q, limit=10), repeat))
+        del vector_catalog
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,109 @@
+"""
+Benchmark the per-call overhead of dispatching an LLM function call to a tool
+
+Compares the original process_function_call (imports the tool modules and
+schemas, rebuilds the tool map, validates with Pydantic, drops None values,
+then serializes the parameters to a "key=repr(value)" string for tool.run to
+parse again) with the import-time registry (one validation, direct call).
+
+The tool itself is replaced by a no-op so only the dispatch is measured.
+
+Usage (from the repository root):
+    python benchmarks/bench_tool_dispatch.py [calls]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from langchain_core.tools import tool
+from tools.registry import ToolSpec
+from models.schemas import TrackOrderParams
+
+
+@tool
+def noop_track_order(order_id: str) -> dict:
+    """Stand-in for track_order that does no work"""
+    return {"order_id": order_id}
+
+
+FUNCTION_CALL = {"intent": "track_order", "parameters": {"order_id": "ORD123"}}
+
+
+def legacy_dispatch(function_call):
+    """The original process_function_call, with the no-op tool"""
+    from tools.product_tools import check_product_availability, recommend_alternatives, apply_discount
+    from tools.order_tools import track_order
+    from tools.negotiation_tools import handle_negotiation
+    from tools.consultation_tools import consultation_service
+    from models.schemas import (
+        CheckProductAvailabilityParams, TrackOrderParams,
+        ApplyDiscountParams, RecommendAlternativesParams,
+        HandleNegotiationParams, ConsultationParams,
+    )
+
+    intent = function_call.get("intent")
+    parameters = function_call.get("parameters", {})
+
+    available_tools = {
+        "check_product_availability": (check_product_availability, CheckProductAvailabilityParams),
+        "track_order": (noop_track_order, TrackOrderParams),
+        "apply_discount": (apply_discount, ApplyDiscountParams),
+        "recommend_alternatives": (recommend_alternatives, RecommendAlternativesParams),
+        "handle_negotiation": (handle_negotiation, HandleNegotiationParams),
+        "consultation_service": (consultation_service, ConsultationParams)
+    }
+
+    if intent not in available_tools:
+        return {"error": f"Unknown intent: {intent}"}
+
+    tool_func, param_model = available_tools[intent]
+    validated_params = param_model(**parameters).model_dump()
+    validated_params = {k: v for k, v in validated_params.items() if v is not None}
+
+    param_str = " ".join([f"{k}={repr(v)}" for k, v in validated_params.items()])
+    return tool_func.run(param_str)
+
+
+REGISTRY = {"track_order": ToolSpec("track_order", noop_track_order, TrackOrderParams)}
+
+
+def registry_dispatch(function_call):
+    """The registry dispatch used by process_function_call, with the no-op tool"""
+    spec = REGISTRY.get(function_call.get("intent"))
+    if spec is None:
+        return {"error": f"Unknown intent: {function_call.get('intent')}"}
+    return spec.func(**spec.validate(function_call.get("parameters") or {}))
+
+
+def time_calls(dispatch, calls):
+    """Return per-call latencies in microseconds"""
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        dispatch(FUNCTION_CALL)
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+    return sorted(latencies)
+
+
+def report(name, latencies):
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<10} p50 {statistics.median(latencies):9.2f} us   p95 {p95:9.2f} us")
+    return statistics.median(latencies)
+
+
+def main(calls):
+    # Warm up imports and Pydantic validators
+    legacy_dispatch(FUNCTION_CALL)
+    registry_dispatch(FUNCTION_CALL)
+
+    legacy = report("legacy", time_calls(legacy_dispatch, calls))
+    registry = report("registry", time_calls(registry_dispatch, calls))
+    print(f"Dispatch overhead: {legacy / registry:.1f}x lower with the registry")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
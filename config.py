@@ -16,6 +16,103 @@ GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
 # LLM Configuration
 MODEL_NAME = "llama3-70b-8192" #"gemma2-9b-it"
 
+# Product Search Configuration
+# Minimum similarity (0-1) for a misspelled word to be corrected to a catalog word
+FUZZY_MATCH_THRESHOLD = float(os.getenv("FUZZY_MATCH_THRESHOLD", "0.7"))
+# Catalogs with at least this many products are searched with the NumPy-backed VectorCatalog
+VECTOR_SEARCH_MIN_PRODUCTS = int(os.getenv("VECTOR_SEARCH_MIN_PRODUCTS", "5000"))
+# Maximum number of matches returned by a product search
+PRODUCT_SEARCH_MAX_RESULTS = int(os.getenv("PRODUCT_SEARCH_MAX_RESULTS", "10"))
+# Maximum number of alternatives recommended for a product
+MAX_ALTERNATIVES = int(os.getenv("MAX_ALTERNATIVES", "5"))
+# Where the catalog is read from: "memory" (data/mock_data), "sqlite" or "snapshot"
+CATALOG_BACKEND = os.getenv("CATALOG_BACKEND", "memory").lower()
+# SQLite catalog database, loaded with `python -m data.sqlite_catalog`
+CATALOG_DB_PATH = os.getenv("CATALOG_DB_PATH", "catalog.db")
+# Memory-mapped catalog snapshot, written with `python -m data.catalog_snapshot`
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", "catalog.snapshot")
+
+# Concurrency Configuration
+# Size of the thread pool used by the async pipeline for tools that only have a blocking implementation
+TOOL_EXECUTOR_MAX_WORKERS = int(os.getenv("TOOL_EXECUTOR_MAX_WORKERS", "8"))
+# Most function calls executed for one message; further calls in the same response are ignored
+MAX_FUNCTION_CALLS_PER_TURN = int(os.getenv("MAX_FUNCTION_CALLS_PER_TURN", "4"))
+
+# Intent fast path Configuration
+# Answer obvious requests ("track ORD123", "apply SUMMER25 to facial cleanser") without the LLM
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Lowest classifier confidence (0-1) that skips the LLM
+INTENT_ROUTER_MIN_CONFIDENCE = float(os.getenv("INTENT_ROUTER_MIN_CONFIDENCE", "0.85"))
+
+# Negotiation Configuration
+# How Zita words a negotiation decision: "template" (instant, from a local template bank) or
+# "llm" (streamed after the decision by the LLM; non-streaming endpoints always use templates)
+NEGOTIATION_PERSONA_MODE = os.getenv("NEGOTIATION_PERSONA_MODE", "template").lower()
+
+# LLM connection pool Configuration (per pooled client)
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "100"))
+LLM_POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "20"))
+LLM_POOL_KEEPALIVE_EXPIRY = float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "60"))
+
+# LLM request coalescing Configuration
+# Identical prompts in flight at the same time share one LLM call
+LLM_COALESCE_ENABLED = os.getenv("LLM_COALESCE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Seconds a finished completion is still shared with identical prompts (0: only while the call is in flight)
+LLM_COALESCE_WINDOW = float(os.getenv("LLM_COALESCE_WINDOW", "0"))
+# Most requests waiting on one call; later identical requests make their own call (0: no limit)
+LLM_COALESCE_MAX_WAITERS = int(os.getenv("LLM_COALESCE_MAX_WAITERS", "100"))
+
+# Prompt token budget Configuration
+# Hard ceiling for prompt tokens; history is trimmed to fit (llama3-70b-8192 leaves room for the reply)
+PROMPT_MAX_TOKENS = int(os.getenv("PROMPT_MAX_TOKENS", "7000"))
+# Token counter: "estimate" (fast local estimate), "chars" (4 characters per token) or "tiktoken"
+PROMPT_TOKENIZER = os.getenv("PROMPT_TOKENIZER", "estimate").lower()
+
+# LLM response cache Configuration
+# Cached completions for repeated customer questions (0 disables the cache) and their lifetime in seconds
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+# Intents whose completions depend on more than the conversation text, so they are never cached
+RESPONSE_CACHE_BYPASS_INTENTS = [
+    intent.strip() for intent in os.getenv("RESPONSE_CACHE_BYPASS_INTENTS", "handle_negotiation").split(",") if intent.strip()
+]
+
+# Business description cache Configuration
+# JSON file generated descriptions are saved to (empty to keep them in memory only) and their lifetime in seconds
+DESCRIPTION_CACHE_PATH = os.getenv("DESCRIPTION_CACHE_PATH", "business_descriptions.json")
+DESCRIPTION_CACHE_TTL = float(os.getenv("DESCRIPTION_CACHE_TTL", str(7 * 24 * 3600)))
+# Generate every missing description in the background when the API starts, with at most this many LLM calls at once
+DESCRIPTION_WARMUP_ON_STARTUP = os.getenv("DESCRIPTION_WARMUP_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+DESCRIPTION_WARMUP_CONCURRENCY = int(os.getenv("DESCRIPTION_WARMUP_CONCURRENCY", "4"))
+
+# Consultation search Configuration
+# Seconds a web search result is reused for the same (normalized) query, and most results kept
+CONSULTATION_CACHE_TTL = float(os.getenv("CONSULTATION_CACHE_TTL", "3600"))
+CONSULTATION_CACHE_MAX_ENTRIES = int(os.getenv("CONSULTATION_CACHE_MAX_ENTRIES", "1024"))
+
+# Conversation memory Configuration
+# Most recent turns always kept verbatim in the prompt
+MEMORY_RECENT_TURNS = int(os.getenv("MEMORY_RECENT_TURNS", "4"))
+# Approximate tokens of conversation history before older turns are summarized
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "1500"))
+# Length the running summary is asked to stay under
+MEMORY_SUMMARY_MAX_TOKENS = int(os.getenv("MEMORY_SUMMARY_MAX_TOKENS", "300"))
+# Background threads writing summaries
+MEMORY_SUMMARY_WORKERS = int(os.getenv("MEMORY_SUMMARY_WORKERS", "2"))
+
+# Session store Configuration
+# Sessions kept in memory per worker; the least recently used are evicted beyond this
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "10000"))
+# Seconds a session can sit idle before it expires
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "3600"))
+# Approximate memory (bytes) all sessions together may hold
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+# SQLite file sessions are persisted to (shared by all workers); empty to keep sessions in memory only
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "")
+# Seconds between write-behind flushes, and queued rows that trigger an early flush
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "0.5"))
+SESSION_FLUSH_BATCH_SIZE = int(os.getenv("SESSION_FLUSH_BATCH_SIZE", "500"))
+
 # UI Configuration
 PAGE_TITLE = "E-commerce Customer Support"
 PAGE_ICON = "💬"
@@ -1 +1,5 @@
-from .mock_data import *
\ No newline at end of file
+from .mock_data import *
+from .catalog_index import *
+from .vector_catalog import *
+from .alternatives_graph import *
+from .catalog_backend import *
@@ -0,0 +1,142 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from data.catalog_index import tokenize
+
+
+class AlternativesGraph:
+    """
+    Precomputed product similarity graph for recommending alternatives
+
+    Every SKU gets a ranked list of similar products from its own category
+    (like category_alternatives, alternatives never cross categories),
+    ranked by shared name tokens and price proximity. The in-stock top
+    neighbours of every SKU are kept ready. When a product's stock changes,
+    only the SKUs that list it as a neighbour are refreshed, so an
+    alternatives answer is always one lookup.
+    """
+
+    # Similarity weights (neighbours always share the category)
+    TOKEN_WEIGHT = 0.6
+    PRICE_WEIGHT = 0.4
+
+    def __init__(
+        self,
+        catalog: Dict[str, List[Dict[str, Any]]],
+        max_alternatives: int = 5,
+        max_candidates: int = 50,
+        price_window: int = 10
+    ):
+        self.max_alternatives = max_alternatives
+        self.products: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self.category_skus: Dict[str, List[str]] = defaultdict(list)
+
+        for category, products in catalog.items():
+            for product in products:
+                self.products[product["id"]] = (category, product)
+                self.category_skus[category].append(product["id"])
+
+        self.in_stock: Set[str] = {sku for sku, (_, product) in self.products.items() if product["stock"] > 0}
+
+        # Ranked neighbours regardless of stock, and who lists whom as a neighbour
+        self.neighbours: Dict[str, List[str]] = {}
+        self.reverse_neighbours: Dict[str, Set[str]] = defaultdict(set)
+        self._build(max_candidates, price_window)
+
+        # In-stock top neighbours, served directly by alternatives()
+        self.ready: Dict[str, List[str]] = {sku: self._in_stock_top(sku) for sku in self.products}
+        self.category_ready: Dict[str, List[str]] = {
+            category: self._category_in_stock_top(category) for category in self.category_skus
+        }
+
+    def _build(self, max_candidates: int, price_window: int) -> None:
+        """Rank candidate neighbours for every SKU"""
+        tokens = {sku: set(tokenize(product["name"])) for sku, (_, product) in self.products.items()}
+        # Postings per category, so only same-category products become candidates
+        token_postings: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+        for sku, sku_tokens in tokens.items():
+            category = self.products[sku][0]
+            for token in sku_tokens:
+                token_postings[category, token].append(sku)
+
+        # Price-sorted SKUs per category, for price-proximity candidates
+        price_order: Dict[str, List[str]] = {}
+        price_position: Dict[str, int] = {}
+        for category, skus in self.category_skus.items():
+            price_order[category] = sorted(skus, key=lambda sku: self.products[sku][1]["price"])
+            for position, sku in enumerate(price_order[category]):
+                price_position[sku] = position
+
+        for sku, (category, product) in self.products.items():
+            candidates: Set[str] = set()
+
+            # Products of the category sharing name tokens, rarest tokens first
+            for token in sorted(tokens[sku], key=lambda token: len(token_postings[category, token])):
+                candidates.update(token_postings[category, token][:max_candidates])
+                if len(candidates) >= max_candidates:
+                    break
+
+            # Products in the same category with the closest prices
+            ordered = price_order[category]
+            position = price_position[sku]
+            candidates.update(ordered[max(0, position - price_window):position + price_window + 1])
+            candidates.discard(sku)
+
+            scored = [(self._similarity(sku, other, tokens), other) for other in candidates]
+            scored.sort(key=lambda item: item[0], reverse=True)
+            self.neighbours[sku] = [other for _, other in scored]
+            for other in self.neighbours[sku]:
+                self.reverse_neighbours[other].add(sku)
+
+    def _similarity(self, sku: str, other: str, tokens: Dict[str, Set[str]]) -> float:
+        """Similarity between two products of the same category from name tokens and price"""
+        product = self.products[sku][1]
+        other_product = self.products[other][1]
+
+        union = tokens[sku] | tokens[other]
+        token_similarity = len(tokens[sku] & tokens[other]) / len(union) if union else 0.0
+        highest_price = max(product["price"], other_product["price"])
+        price_similarity = 1 - abs(product["price"] - other_product["price"]) / highest_price if highest_price else 1.0
+
+        return self.TOKEN_WEIGHT * token_similarity + self.PRICE_WEIGHT * price_similarity
+
+    def _in_stock_top(self, sku: str) -> List[str]:
+        """The best in-stock neighbours of a SKU"""
+        return [other for other in self.neighbours[sku] if other in self.in_stock][:self.max_alternatives]
+
+    def _category_in_stock_top(self, category: str) -> List[str]:
+        """In-stock products of a category, in catalog order"""
+        return [sku for sku in self.category_skus[category] if sku in self.in_stock][:self.max_alternatives]
+
+    def update_stock(self, sku: str, stock: int) -> None:
+        """Record a stock change and refresh only the affected neighbour lists"""
+        category, product = self.products[sku]
+        product["stock"] = stock
+
+        was_in_stock = sku in self.in_stock
+        if (stock > 0) == was_in_stock:
+            return
+
+        if stock > 0:
+            self.in_stock.add(sku)
+        else:
+            self.in_stock.discard(sku)
+
+        for other in self.reverse_neighbours[sku]:
+            self.ready[other] = self._in_stock_top(other)
+        self.category_ready[category] = self._category_in_stock_top(category)
+
+    def alternatives(self, sku: str) -> List[Dict[str, Any]]:
+        """Ranked in-stock alternatives for a SKU"""
+        return [self._describe(other) for other in self.ready.get(sku, [])]
+
+    def category_alternatives(self, category: str, exclude: Optional[str] = None) -> List[Dict[str, Any]]:
+        """In-stock products of a category, for when the requested product isn't known"""
+        return [self._describe(sku) for sku in self.category_ready.get(category, []) if sku != exclude]
+
+    def _describe(self, sku: str) -> Dict[str, Any]:
+        product = self.products[sku][1]
+        return {
+            "name": product["name"],
+            "price": product["price"],
+            "stock": product["stock"]
+        }
@@ -0,0 +1,142 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import config
+from data.alternatives_graph import AlternativesGraph
+from data.catalog_index import CatalogIndex
+from data.vector_catalog import VectorCatalog
+
+
+class CatalogBackend(ABC):
+    """
+    Interface for the product, order and discount data used by the tools
+
+    Products are dicts with "id", "name", "price" and "stock", as in
+    data/mock_data.PRODUCT_DB.
+    """
+
+    @abstractmethod
+    def categories(self) -> List[str]:
+        """Product categories the store sells"""
+
+    @abstractmethod
+    def search(self, query: str, category: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any], float]]:
+        """Rank products for a query as (category, product, relevance_score), best first"""
+
+    @abstractmethod
+    def alternatives(self, sku: str) -> List[Dict[str, Any]]:
+        """Ranked in-stock alternatives for a product"""
+
+    @abstractmethod
+    def category_alternatives(self, category: str) -> List[Dict[str, Any]]:
+        """In-stock products of a category"""
+
+    @abstractmethod
+    def update_stock(self, sku: str, stock: int) -> None:
+        """Change a product's stock"""
+
+    @abstractmethod
+    def get_order(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Order status, tracking number and delivery date for an order ID"""
+
+    @abstractmethod
+    def get_discount_rate(self, code: str) -> Optional[float]:
+        """Discount rate (0-1) for a discount code, or None if it isn't valid"""
+
+    @abstractmethod
+    def vocabulary(self) -> Iterable[str]:
+        """Every word that appears in a product name"""
+
+    @abstractmethod
+    def is_known_word(self, word: str) -> bool:
+        """Whether a word, or a prefix of one, appears in a product name"""
+
+    @abstractmethod
+    def export(self) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, Dict[str, Any]], Dict[str, float]]:
+        """The whole catalog as (products by category, orders, discount codes) dicts"""
+
+
+class InMemoryCatalog(CatalogBackend):
+    """Catalog held in Python dicts (e.g. data/mock_data), searched with in-memory indexes"""
+
+    def __init__(
+        self,
+        products: Dict[str, List[Dict[str, Any]]],
+        orders: Dict[str, Dict[str, Any]],
+        discount_codes: Dict[str, float]
+    ):
+        self.products = products
+        self.orders = orders
+        self.discount_codes = discount_codes
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Rebuild the indexes after products are added, removed or renamed"""
+        product_count = sum(len(products) for products in self.products.values())
+        # Switch to the vectorized catalog for large stores
+        if product_count >= config.VECTOR_SEARCH_MIN_PRODUCTS:
+            self.index = VectorCatalog(self.products)
+        else:
+            self.index = CatalogIndex(self.products)
+        self.alternatives_graph = AlternativesGraph(self.products, max_alternatives=config.MAX_ALTERNATIVES)
+
+    def categories(self) -> List[str]:
+        return list(self.products.keys())
+
+    def search(self, query: str, category: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any], float]]:
+        return self.index.search(query, category, limit)
+
+    def alternatives(self, sku: str) -> List[Dict[str, Any]]:
+        return self.alternatives_graph.alternatives(sku)
+
+    def category_alternatives(self, category: str) -> List[Dict[str, Any]]:
+        return self.alternatives_graph.category_alternatives(category)
+
+    def update_stock(self, sku: str, stock: int) -> None:
+        self.alternatives_graph.update_stock(sku, stock)
+        if isinstance(self.index, VectorCatalog):
+            self.index.update_stock(sku, stock)
+
+    def get_order(self, order_id: str) -> Optional[Dict[str, Any]]:
+        return self.orders.get(order_id)
+
+    def get_discount_rate(self, code: str) -> Optional[float]:
+        return self.discount_codes.get(code)
+
+    def vocabulary(self) -> Iterable[str]:
+        return self.index.postings.keys()
+
+    def is_known_word(self, word: str) -> bool:
+        return word in self.index.postings or word in self.index.prefix_postings
+
+    def export(self) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, Dict[str, Any]], Dict[str, float]]:
+        return self.products, self.orders, self.discount_codes
+
+
+_catalog: Optional[CatalogBackend] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> CatalogBackend:
+    """
+    Get the process-wide catalog backend selected by config.CATALOG_BACKEND
+
+        memory: data/mock_data held in Python dicts
+        sqlite: an SQLite + FTS5 database at config.CATALOG_DB_PATH
+        snapshot: a memory-mapped snapshot at config.CATALOG_SNAPSHOT_PATH,
+                  shared by all workers on the machine
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                if config.CATALOG_BACKEND == "sqlite":
+                    from data.sqlite_catalog import SQLiteCatalog
+                    _catalog = SQLiteCatalog(config.CATALOG_DB_PATH, config.MAX_ALTERNATIVES)
+                elif config.CATALOG_BACKEND == "snapshot":
+                    from data.catalog_snapshot import SnapshotCatalog
+                    _catalog = SnapshotCatalog(config.CATALOG_SNAPSHOT_PATH)
+                else:
+                    from data.mock_data import PRODUCT_DB, ORDERS_DB, DISCOUNT_CODES
+                    _catalog = InMemoryCatalog(PRODUCT_DB, ORDERS_DB, DISCOUNT_CODES)
+    return _catalog
@@ -0,0 +1,114 @@
+import math
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Shortest query token that is also matched as a prefix of product name tokens
+MIN_PREFIX_LENGTH = 2
+
+# Weight of a prefix hit ("jean" -> "jeans") relative to an exact token hit
+PREFIX_MATCH_WEIGHT = 0.6
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens"""
+    return re.findall(r'[a-z0-9]+', text.lower())
+
+
+def word_trigrams(word: str) -> List[str]:
+    """Character trigrams of a word, padded so short words still have some"""
+    padded = f"  {word} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class CatalogIndex:
+    """
+    Token-level inverted index over a {category: [product, ...]} catalog
+
+    The index is built once; a search only touches the postings of the query
+    tokens, so its cost depends on the query rather than the catalog size.
+    Product dicts are referenced, not copied, so stock and price changes are
+    visible without rebuilding.
+    """
+
+    def __init__(self, catalog: Dict[str, List[Dict[str, Any]]]):
+        self.products: List[Tuple[str, Dict[str, Any]]] = []
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        self.prefix_postings: Dict[str, List[int]] = defaultdict(list)
+        self.name_tokens: List[int] = []
+
+        for category, products in catalog.items():
+            for product in products:
+                self.add_product(category, product)
+
+    def add_product(self, category: str, product: Dict[str, Any]) -> int:
+        """Index a product and return its position in the index"""
+        product_id = len(self.products)
+        self.products.append((category, product))
+
+        tokens = set(tokenize(product["name"]))
+        self.name_tokens.append(len(tokens))
+
+        prefixes = set()
+        for token in tokens:
+            self.postings[token].append(product_id)
+            for end in range(MIN_PREFIX_LENGTH, len(token)):
+                prefixes.add(token[:end])
+        for prefix in prefixes - tokens:
+            self.prefix_postings[prefix].append(product_id)
+
+        return product_id
+
+    def idf(self, token: str) -> float:
+        """Inverse document frequency of a token (exact or prefix hits)"""
+        document_count = len(self.postings.get(token, ())) + len(self.prefix_postings.get(token, ()))
+        return math.log(1 + len(self.products) / (1 + document_count)) + 1
+
+    def search(self, query: str, category: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any], float]]:
+        """
+        Rank products by how well their names match the query
+
+        Args:
+            query: Free-text product query
+            category: Only return products from this category (optional)
+            limit: Maximum number of results (optional)
+
+        Returns:
+            A list of (category, product, relevance_score) tuples, best match first.
+            relevance_score is between 0 and 1.
+        """
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+
+        scores: Dict[int, float] = defaultdict(float)
+        matched_tokens: Dict[int, int] = defaultdict(int)
+        total_weight = 0.0
+
+        for token in query_tokens:
+            exact = self.postings.get(token, ())
+            prefix = self.prefix_postings.get(token, ()) if len(token) >= MIN_PREFIX_LENGTH else ()
+            if not exact and not prefix:
+                # Words that aren't in the catalog (e.g. "the", "price") don't count against a product
+                continue
+
+            weight = self.idf(token)
+            total_weight += weight
+            for product_id in exact:
+                scores[product_id] += weight
+                matched_tokens[product_id] += 1
+            for product_id in prefix:
+                scores[product_id] += weight * PREFIX_MATCH_WEIGHT
+                matched_tokens[product_id] += 1
+
+        results = []
+        for product_id, score in scores.items():
+            product_category, product = self.products[product_id]
+            if category and category != product_category:
+                continue
+            # Mostly how much of the query matched, plus how much of the name was covered
+            name_coverage = min(1.0, matched_tokens[product_id] / max(1, self.name_tokens[product_id]))
+            relevance = 0.8 * (score / total_weight) + 0.2 * name_coverage
+            results.append((product_category, product, round(relevance, 3)))
+
+        results.sort(key=lambda result: result[2], reverse=True)
+        return results[:limit] if limit else results
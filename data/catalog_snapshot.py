@@ -0,0 +1,413 @@
+"""
+Memory-mapped columnar catalog snapshot
+
+A snapshot is one file holding the catalog as fixed-width NumPy columns
+(price, stock, category code, name/id offsets), a UTF-8 string table, the
+SKUs in sorted order, the TF-IDF postings of every name word, the trigram
+postings used for spelling correction and the precomputed alternatives
+lists. Workers map it read-only and read the columns in place, so N uvicorn
+workers share one copy of the catalog in the page cache instead of each
+building its own dicts and indexes.
+
+Build a snapshot from the configured catalog backend (from the repository root):
+    python -m data.catalog_snapshot catalog.snapshot
+
+then run the workers with CATALOG_BACKEND=snapshot.
+
+File layout:
+    8 bytes     magic ("ZCATSNP2")
+    8 bytes     header length (little-endian uint64)
+    header      JSON: product/term counts, categories, orders, discount
+                codes and {section: [offset, dtype, length]}
+    sections    NumPy arrays, each 8-byte aligned
+"""
+import argparse
+import bisect
+import json
+import math
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from data.alternatives_graph import AlternativesGraph
+from data.catalog_backend import CatalogBackend
+from data.catalog_index import MIN_PREFIX_LENGTH, PREFIX_MATCH_WEIGHT, tokenize, word_trigrams
+from data.vector_catalog import VectorCatalog
+
+
+MAGIC = b"ZCATSNP2"
+
+# Most vocabulary words a query prefix ("ja" -> "jacket", "jam", ...) expands to
+MAX_PREFIX_EXPANSION = 64
+
+
+class _StringColumn:
+    """A sequence of strings stored as offsets into a UTF-8 blob (works with bisect)"""
+
+    def __init__(self, offsets: np.ndarray, blob: memoryview):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position: int) -> str:
+        return bytes(self.blob[self.offsets[position]:self.offsets[position + 1]]).decode("utf-8")
+
+
+class _SortedView:
+    """Strings of a column in the order given by an index array (works with bisect)"""
+
+    def __init__(self, strings: _StringColumn, order: np.ndarray):
+        self.strings = strings
+        self.order = order
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __getitem__(self, position: int) -> str:
+        return self.strings[self.order[position]]
+
+
+class _TrigramPostings:
+    """Vocabulary words by trigram, read from the snapshot (the FuzzyTokenMatcher postings)"""
+
+    def __init__(self, trigrams: _StringColumn, indptr: np.ndarray, term_ids: np.ndarray, terms: _StringColumn):
+        self.trigrams = trigrams
+        self.indptr = indptr
+        self.term_ids = term_ids
+        self.terms = terms
+
+    def get(self, trigram: str, default: Iterable[str] = ()) -> Iterable[str]:
+        position = bisect.bisect_left(self.trigrams, trigram)
+        if position == len(self.trigrams) or self.trigrams[position] != trigram:
+            return default
+        term_ids = self.term_ids[self.indptr[position]:self.indptr[position + 1]]
+        return [self.terms[term_id] for term_id in term_ids]
+
+
+def _postings_section(postings: Dict[str, List[int]]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Encode {key: [id, ...]} as (sorted keys, indptr, ids)"""
+    keys = sorted(postings)
+    indptr = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum([len(postings[key]) for key in keys], out=indptr[1:])
+    ids = np.array([value for key in keys for value in postings[key]], dtype=np.int32)
+    return keys, indptr, ids
+
+
+def _string_section(strings: List[str]) -> Tuple[np.ndarray, bytes]:
+    """Encode strings as (offsets, blob)"""
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(string) for string in encoded], out=offsets[1:])
+    return offsets, b"".join(encoded)
+
+
+def write_snapshot(
+    path: str,
+    products: Dict[str, List[Dict[str, Any]]],
+    orders: Dict[str, Dict[str, Any]],
+    discount_codes: Dict[str, float],
+    max_alternatives: int = 5
+) -> None:
+    """
+    Write a catalog snapshot
+
+    Args:
+        path: Snapshot file to write (replaced atomically)
+        products: {category: [product, ...]} catalog
+        orders: Orders by order ID
+        discount_codes: Discount rates by code
+        max_alternatives: Alternatives served per product
+    """
+    # Reuse the in-memory indexes to compute term weights and neighbours
+    vectors = VectorCatalog(products, index_prefixes=False)
+    graph = AlternativesGraph(products, max_alternatives=max_alternatives)
+    skus = [product["id"] for _, product in vectors.products]
+
+    # Vocabulary in sorted order so workers can binary search it
+    terms = sorted(vectors.postings)
+    term_ids = np.array([vectors.postings[term] for term in terms], dtype=np.int64)
+    lengths = vectors.term_indptr[term_ids + 1] - vectors.term_indptr[term_ids]
+    term_indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=term_indptr[1:])
+    slices = [slice(vectors.term_indptr[term_id], vectors.term_indptr[term_id + 1]) for term_id in term_ids]
+    term_docs = np.concatenate([vectors.term_docs[s] for s in slices] or [np.zeros(0, dtype=np.int32)])
+    term_weights = np.concatenate([vectors.term_weights[s] for s in slices] or [np.zeros(0)])
+
+    neighbour_lists = [[vectors.positions[other] for other in graph.neighbours[sku]] for sku in skus]
+    neighbour_indptr = np.zeros(len(skus) + 1, dtype=np.int64)
+    np.cumsum([len(neighbours) for neighbours in neighbour_lists], out=neighbour_indptr[1:])
+
+    # SKUs in sorted order, so workers binary search them instead of building a dict
+    id_order = np.array(sorted(range(len(skus)), key=skus.__getitem__), dtype=np.int32)
+
+    trigram_postings: Dict[str, List[int]] = {}
+    for term_id, term in enumerate(terms):
+        for trigram in set(word_trigrams(term)):
+            trigram_postings.setdefault(trigram, []).append(term_id)
+    trigrams, trigram_indptr, trigram_terms = _postings_section(trigram_postings)
+
+    id_offsets, id_blob = _string_section(skus)
+    name_offsets, name_blob = _string_section([product["name"] for _, product in vectors.products])
+    term_offsets, term_blob = _string_section(terms)
+    trigram_offsets, trigram_blob = _string_section(trigrams)
+
+    sections = {
+        "prices": vectors.prices,
+        "stock": vectors.stock,
+        "category_codes": vectors.category_codes,
+        "id_offsets": id_offsets,
+        "ids": np.frombuffer(id_blob, dtype=np.uint8),
+        "id_order": id_order,
+        "name_offsets": name_offsets,
+        "names": np.frombuffer(name_blob, dtype=np.uint8),
+        "term_offsets": term_offsets,
+        "terms": np.frombuffer(term_blob, dtype=np.uint8),
+        "idf": vectors.idf[term_ids],
+        "term_indptr": term_indptr,
+        "term_docs": term_docs.astype(np.int32),
+        "term_weights": term_weights.astype(np.float32),
+        "trigram_offsets": trigram_offsets,
+        "trigrams": np.frombuffer(trigram_blob, dtype=np.uint8),
+        "trigram_indptr": trigram_indptr,
+        "trigram_terms": trigram_terms,
+        "neighbour_indptr": neighbour_indptr,
+        "neighbours": np.array([other for neighbours in neighbour_lists for other in neighbours], dtype=np.int32),
+    }
+
+    # Lay the sections out after the header, 8-byte aligned
+    layout = {}
+    offset = 0
+    for name, array in sections.items():
+        layout[name] = [offset, array.dtype.str, len(array)]
+        offset += -(-array.nbytes // 8) * 8
+    header = json.dumps({
+        "products": len(skus),
+        "terms": len(terms),
+        "max_alternatives": max_alternatives,
+        "categories": vectors.categories,
+        "orders": orders,
+        "discount_codes": discount_codes,
+        "sections": layout,
+    }).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // 8) * 8
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for name, array in sections.items():
+            f.seek(data_start + layout[name][0])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(temporary_path, path)
+
+
+class SnapshotCatalog(CatalogBackend):
+    """
+    Catalog read in place from a memory-mapped snapshot
+
+    The snapshot is a build artefact and is mapped read-only. Stock updates
+    are kept in a small per-worker overlay on top of the stock column; to
+    publish stock changes to every worker, update the source catalog and
+    rebuild the snapshot.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot (or was written by an older version; rebuild it)")
+        header_length = struct.unpack_from("<Q", self._mmap, len(MAGIC))[0]
+        header_start = len(MAGIC) + 8
+        header = json.loads(self._mmap[header_start:header_start + header_length])
+        data_start = -(-(header_start + header_length) // 8) * 8
+
+        # Zero-copy views over the mapped file
+        buffer = memoryview(self._mmap)
+        columns = {
+            name: np.frombuffer(buffer, dtype=np.dtype(dtype), count=length, offset=data_start + offset)
+            for name, (offset, dtype, length) in header["sections"].items()
+        }
+
+        self.product_count = header["products"]
+        self.max_alternatives = header["max_alternatives"]
+        self._categories: List[str] = header["categories"]
+        self.orders: Dict[str, Dict[str, Any]] = header["orders"]
+        self.discount_codes: Dict[str, float] = header["discount_codes"]
+
+        self.prices = columns["prices"]
+        self.stock = columns["stock"]
+        # Position -> stock for products updated in this worker since the snapshot was built
+        self._stock_overrides: Dict[int, int] = {}
+        self.category_codes = columns["category_codes"]
+        self.ids = _StringColumn(columns["id_offsets"], columns["ids"].data)
+        self.names = _StringColumn(columns["name_offsets"], columns["names"].data)
+        self.terms = _StringColumn(columns["term_offsets"], columns["terms"].data)
+        self.idf = columns["idf"]
+        self.term_indptr = columns["term_indptr"]
+        self.term_docs = columns["term_docs"]
+        self.term_weights = columns["term_weights"]
+        self.neighbour_indptr = columns["neighbour_indptr"]
+        self.neighbours = columns["neighbours"]
+        self.sorted_ids = _SortedView(self.ids, columns["id_order"])
+        self.trigram_postings = _TrigramPostings(
+            _StringColumn(columns["trigram_offsets"], columns["trigrams"].data),
+            columns["trigram_indptr"],
+            columns["trigram_terms"],
+            self.terms
+        )
+
+    def _position(self, sku: str) -> Optional[int]:
+        index = bisect.bisect_left(self.sorted_ids, sku)
+        if index < len(self.sorted_ids) and self.sorted_ids[index] == sku:
+            return int(self.sorted_ids.order[index])
+        return None
+
+    def _stock_at(self, positions: np.ndarray) -> np.ndarray:
+        """Stock of some products, with this worker's updates applied"""
+        stock = self.stock[positions]
+        if self._stock_overrides:
+            updated = np.fromiter(self._stock_overrides, dtype=np.int64, count=len(self._stock_overrides))
+            for index in np.flatnonzero(np.isin(positions, updated)):
+                stock[index] = self._stock_overrides[int(positions[index])]
+        return stock
+
+    def _product(self, position: int) -> Dict[str, Any]:
+        price = float(self.prices[position])
+        return {
+            "id": self.ids[position],
+            "name": self.names[position],
+            "price": int(price) if price.is_integer() else price,
+            "stock": int(self._stock_overrides.get(position, self.stock[position])),
+        }
+
+    def _describe(self, position: int) -> Dict[str, Any]:
+        product = self._product(position)
+        return {"name": product["name"], "price": product["price"], "stock": product["stock"]}
+
+    def _term_id(self, word: str) -> Optional[int]:
+        position = bisect.bisect_left(self.terms, word)
+        if position < len(self.terms) and self.terms[position] == word:
+            return position
+        return None
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """Term ids of the vocabulary words starting with a prefix"""
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + "\U0010ffff", lo=start)
+        return start, end
+
+    def categories(self) -> List[str]:
+        return self._categories
+
+    def scores(self, query: str) -> np.ndarray:
+        """Cosine similarity between the query and every product name"""
+        scores = np.zeros(self.product_count, dtype=np.float64)
+        query_weights = []
+
+        for token in dict.fromkeys(tokenize(query)):
+            term_id = self._term_id(token)
+            if term_id is not None:
+                start, end = self.term_indptr[term_id], self.term_indptr[term_id + 1]
+                scores[self.term_docs[start:end]] += self.idf[term_id] * self.term_weights[start:end]
+                query_weights.append(float(self.idf[term_id]))
+                continue
+
+            if len(token) < MIN_PREFIX_LENGTH:
+                continue
+            first, last = self._prefix_range(token)
+            if first == last:
+                continue
+            # A product scores its best word that starts with the prefix
+            prefix_scores = np.zeros(self.product_count, dtype=np.float64)
+            for term_id in range(first, min(last, first + MAX_PREFIX_EXPANSION)):
+                start, end = self.term_indptr[term_id], self.term_indptr[term_id + 1]
+                np.maximum.at(prefix_scores, self.term_docs[start:end], self.term_weights[start:end])
+            document_count = np.count_nonzero(prefix_scores)
+            weight = math.log((1 + self.product_count) / (1 + document_count)) + 1
+            scores += weight * PREFIX_MATCH_WEIGHT * prefix_scores
+            query_weights.append(weight)
+
+        if query_weights:
+            scores /= math.sqrt(sum(weight ** 2 for weight in query_weights))
+        return scores
+
+    def search(self, query: str, category: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any], float]]:
+        scores = self.scores(query)
+        if category:
+            if category not in self._categories:
+                return []
+            scores[self.category_codes != self._categories.index(category)] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if limit and len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        return [
+            (self._categories[self.category_codes[position]], self._product(position), round(float(min(scores[position], 1.0)), 3))
+            for position in candidates
+        ]
+
+    def alternatives(self, sku: str) -> List[Dict[str, Any]]:
+        position = self._position(sku)
+        if position is None:
+            return []
+        neighbours = self.neighbours[self.neighbour_indptr[position]:self.neighbour_indptr[position + 1]]
+        # Neighbours are stored regardless of stock, so stock changes never need a rebuild
+        in_stock = neighbours[self._stock_at(neighbours) > 0][:self.max_alternatives]
+        return [self._describe(other) for other in in_stock]
+
+    def category_alternatives(self, category: str) -> List[Dict[str, Any]]:
+        if category not in self._categories:
+            return []
+        code = self._categories.index(category)
+        in_category = np.flatnonzero(self.category_codes == code)
+        in_stock = in_category[self._stock_at(in_category) > 0][:self.max_alternatives]
+        return [self._describe(position) for position in in_stock]
+
+    def update_stock(self, sku: str, stock: int) -> None:
+        position = self._position(sku)
+        if position is None:
+            raise KeyError(sku)
+        self._stock_overrides[position] = stock
+
+    def get_order(self, order_id: str) -> Optional[Dict[str, Any]]:
+        return self.orders.get(order_id)
+
+    def get_discount_rate(self, code: str) -> Optional[float]:
+        return self.discount_codes.get(code)
+
+    def vocabulary(self) -> Iterable[str]:
+        return (self.terms[term_id] for term_id in range(len(self.terms)))
+
+    def is_known_word(self, word: str) -> bool:
+        position = bisect.bisect_left(self.terms, word)
+        return position < len(self.terms) and self.terms[position].startswith(word)
+
+    def export(self) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, Dict[str, Any]], Dict[str, float]]:
+        products: Dict[str, List[Dict[str, Any]]] = {category: [] for category in self._categories}
+        for position in range(self.product_count):
+            products[self._categories[self.category_codes[position]]].append(self._product(position))
+        return products, self.orders, self.discount_codes
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import config
+    from data.catalog_backend import get_catalog
+
+    parser = argparse.ArgumentParser(description="Write a memory-mapped snapshot of the configured catalog backend")
+    parser.add_argument("path", nargs="?", default=config.CATALOG_SNAPSHOT_PATH, help="Snapshot file to write")
+    args = parser.parse_args(argv)
+
+    products, orders, discount_codes = get_catalog().export()
+    write_snapshot(args.path, products, orders, discount_codes, config.MAX_ALTERNATIVES)
+    print(f"Wrote {sum(len(items) for items in products.values()):,} products to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+SQLite catalog backend
+
+Products, orders and discount codes live in one SQLite database. Product
+names are indexed with an FTS5 table, so searches, alternatives and lookups
+are indexed queries instead of scans over Python dicts, and the catalog no
+longer has to fit in memory.
+
+Load a catalog with the streaming importer (from the repository root):
+    python -m data.sqlite_catalog products catalog.csv --db catalog.db
+    python -m data.sqlite_catalog orders orders.jsonl --db catalog.db
+    python -m data.sqlite_catalog discounts discounts.csv --db catalog.db
+    python -m data.sqlite_catalog seed --db catalog.db      # load data/mock_data
+
+Products need id, category, name, price and stock columns (or JSON keys),
+orders need order_id, status, tracking and delivery_date, and discount codes
+need code and rate.
+"""
+import argparse
+import csv
+import json
+import sqlite3
+import threading
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from data.catalog_backend import CatalogBackend
+from data.catalog_index import tokenize
+
+
+# Rows written per transaction by the importer
+IMPORT_BATCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    pk INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    category TEXT NOT NULL,
+    name TEXT NOT NULL,
+    price NUMERIC NOT NULL,
+    stock INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS products_category_price ON products (category, price);
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5 (name, content='products', content_rowid='pk');
+CREATE VIRTUAL TABLE IF NOT EXISTS products_vocab USING fts5vocab (products_fts, row);
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    tracking TEXT,
+    delivery_date TEXT
+);
+CREATE TABLE IF NOT EXISTS discount_codes (
+    code TEXT PRIMARY KEY,
+    rate REAL NOT NULL
+);
+"""
+
+# Statements are constant strings so sqlite3 reuses their prepared form
+# from each connection's statement cache
+SEARCH_SQL = """
+SELECT p.category, p.id, p.name, p.price, p.stock, bm25(products_fts) AS rank
+FROM products_fts JOIN products p ON p.pk = products_fts.rowid
+WHERE products_fts MATCH ?
+ORDER BY rank LIMIT ?
+"""
+SEARCH_CATEGORY_SQL = """
+SELECT p.category, p.id, p.name, p.price, p.stock, bm25(products_fts) AS rank
+FROM products_fts JOIN products p ON p.pk = products_fts.rowid
+WHERE products_fts MATCH ? AND p.category = ?
+ORDER BY rank LIMIT ?
+"""
+PRODUCT_SQL = "SELECT category, price FROM products WHERE id = ?"
+CHEAPER_SQL = """
+SELECT id, name, price, stock FROM products
+WHERE category = ? AND price <= ? AND stock > 0 AND id != ?
+ORDER BY price DESC LIMIT ?
+"""
+PRICIER_SQL = """
+SELECT id, name, price, stock FROM products
+WHERE category = ? AND price > ? AND stock > 0
+ORDER BY price LIMIT ?
+"""
+CATEGORY_IN_STOCK_SQL = "SELECT name, price, stock FROM products WHERE category = ? AND stock > 0 ORDER BY pk LIMIT ?"
+CATEGORIES_SQL = "SELECT category FROM products GROUP BY category ORDER BY MIN(pk)"
+UPDATE_STOCK_SQL = "UPDATE products SET stock = ? WHERE id = ?"
+ORDER_SQL = "SELECT status, tracking, delivery_date FROM orders WHERE order_id = ?"
+DISCOUNT_SQL = "SELECT rate FROM discount_codes WHERE code = ?"
+VOCABULARY_SQL = "SELECT term FROM products_vocab"
+NEXT_TERM_SQL = "SELECT term FROM products_vocab WHERE term >= ? LIMIT 1"
+EXPORT_PRODUCTS_SQL = "SELECT category, id, name, price, stock FROM products ORDER BY pk"
+EXPORT_ORDERS_SQL = "SELECT order_id, status, tracking, delivery_date FROM orders"
+EXPORT_DISCOUNTS_SQL = "SELECT code, rate FROM discount_codes"
+UPSERT_PRODUCT_SQL = """
+INSERT INTO products (id, category, name, price, stock) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    category = excluded.category, name = excluded.name, price = excluded.price, stock = excluded.stock
+"""
+UPSERT_ORDER_SQL = """
+INSERT INTO orders (order_id, status, tracking, delivery_date) VALUES (?, ?, ?, ?)
+ON CONFLICT (order_id) DO UPDATE SET
+    status = excluded.status, tracking = excluded.tracking, delivery_date = excluded.delivery_date
+"""
+UPSERT_DISCOUNT_SQL = "INSERT INTO discount_codes (code, rate) VALUES (?, ?) ON CONFLICT (code) DO UPDATE SET rate = excluded.rate"
+REBUILD_FTS_SQL = "INSERT INTO products_fts (products_fts) VALUES ('rebuild')"
+
+
+def _number(value: Any) -> Any:
+    """Parse a CSV price, keeping whole numbers as ints like data/mock_data"""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def _batches(rows: Iterable[Tuple], size: int) -> Iterator[List[Tuple]]:
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream records from a CSV (with a header row) or JSON Lines file"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson", ".json")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+class SQLiteCatalog(CatalogBackend):
+    """
+    Catalog stored in an SQLite database with an FTS5 index over product names
+
+    Each thread gets its own connection (sqlite3 connections can't be shared
+    across threads), opened on first use in WAL mode so tool calls running
+    in the executor can read while the importer writes.
+    """
+
+    def __init__(self, path: str, max_alternatives: int = 5):
+        self.path = path
+        self.max_alternatives = max_alternatives
+        self._local = threading.local()
+        self._categories: Optional[List[str]] = None
+        self.connection.executescript(SCHEMA)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection to the database"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, uri=self.path.startswith("file:"), cached_statements=256)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def categories(self) -> List[str]:
+        if self._categories is None:
+            self._categories = [row[0] for row in self.connection.execute(CATEGORIES_SQL)]
+        return self._categories
+
+    def search(self, query: str, category: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any], float]]:
+        """
+        Rank products by how well their names match the query
+
+        Every query word is matched as a word or a word prefix. Relevance
+        combines the BM25 rank (relative to the best result) with how much
+        of the query and of the product name matched, so it stays between
+        0 and 1 like the in-memory indexes.
+        """
+        query_tokens = [token for token in dict.fromkeys(tokenize(query)) if self.is_known_word(token)]
+        if not query_tokens:
+            return []
+
+        match = " OR ".join(f'"{token}"*' for token in query_tokens)
+        if category:
+            rows = self.connection.execute(SEARCH_CATEGORY_SQL, (match, category, limit or -1)).fetchall()
+        else:
+            rows = self.connection.execute(SEARCH_SQL, (match, limit or -1)).fetchall()
+        if not rows:
+            return []
+
+        best_rank = rows[0][5] or -1.0
+        results = []
+        for product_category, sku, name, price, stock, rank in rows:
+            name_tokens = set(tokenize(name))
+            matched = sum(
+                1 for token in query_tokens
+                if token in name_tokens or any(name_token.startswith(token) for name_token in name_tokens)
+            )
+            relevance = (
+                0.5 * (rank / best_rank if best_rank else 1.0)
+                + 0.3 * matched / len(query_tokens)
+                + 0.2 * min(1.0, matched / max(1, len(name_tokens)))
+            )
+            product = {"id": sku, "name": name, "price": price, "stock": stock}
+            results.append((product_category, product, round(min(relevance, 1.0), 3)))
+
+        results.sort(key=lambda result: result[2], reverse=True)
+        return results
+
+    def alternatives(self, sku: str) -> List[Dict[str, Any]]:
+        """In-stock products of the same category, closest in price first"""
+        row = self.connection.execute(PRODUCT_SQL, (sku,)).fetchone()
+        if row is None:
+            return []
+        category, price = row
+
+        # Walk the (category, price) index outwards from the product's price
+        candidates = self.connection.execute(CHEAPER_SQL, (category, price, sku, self.max_alternatives)).fetchall()
+        candidates += self.connection.execute(PRICIER_SQL, (category, price, self.max_alternatives)).fetchall()
+        candidates.sort(key=lambda candidate: abs(candidate[2] - price))
+        return [
+            {"name": name, "price": candidate_price, "stock": stock}
+            for _, name, candidate_price, stock in candidates[:self.max_alternatives]
+        ]
+
+    def category_alternatives(self, category: str) -> List[Dict[str, Any]]:
+        return [
+            {"name": name, "price": price, "stock": stock}
+            for name, price, stock in self.connection.execute(CATEGORY_IN_STOCK_SQL, (category, self.max_alternatives))
+        ]
+
+    def update_stock(self, sku: str, stock: int) -> None:
+        with self.connection:
+            self.connection.execute(UPDATE_STOCK_SQL, (stock, sku))
+
+    def get_order(self, order_id: str) -> Optional[Dict[str, Any]]:
+        row = self.connection.execute(ORDER_SQL, (order_id,)).fetchone()
+        if row is None:
+            return None
+        return {"status": row[0], "tracking": row[1], "delivery_date": row[2]}
+
+    def get_discount_rate(self, code: str) -> Optional[float]:
+        row = self.connection.execute(DISCOUNT_SQL, (code,)).fetchone()
+        return row[0] if row else None
+
+    def vocabulary(self) -> Iterable[str]:
+        return [row[0] for row in self.connection.execute(VOCABULARY_SQL)]
+
+    def is_known_word(self, word: str) -> bool:
+        # The first vocabulary term at or after the word starts with it if the word is known
+        row = self.connection.execute(NEXT_TERM_SQL, (word,)).fetchone()
+        return row is not None and row[0].startswith(word)
+
+    def export(self) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, Dict[str, Any]], Dict[str, float]]:
+        products: Dict[str, List[Dict[str, Any]]] = {}
+        for category, sku, name, price, stock in self.connection.execute(EXPORT_PRODUCTS_SQL):
+            products.setdefault(category, []).append({"id": sku, "name": name, "price": price, "stock": stock})
+        orders = {
+            order_id: {"status": status, "tracking": tracking, "delivery_date": delivery_date}
+            for order_id, status, tracking, delivery_date in self.connection.execute(EXPORT_ORDERS_SQL)
+        }
+        discount_codes = dict(self.connection.execute(EXPORT_DISCOUNTS_SQL).fetchall())
+        return products, orders, discount_codes
+
+    def import_products(self, records: Iterable[Dict[str, Any]], batch_size: int = IMPORT_BATCH_SIZE) -> int:
+        """
+        Insert or update products from a stream of records
+
+        Args:
+            records: Dicts with id, category, name, price and stock
+            batch_size: Rows written per transaction
+
+        Returns:
+            Number of products imported
+        """
+        rows = (
+            (str(record["id"]), str(record["category"]).lower(), record["name"], _number(record["price"]), int(record["stock"]))
+            for record in records
+        )
+        count = self._write_batches(UPSERT_PRODUCT_SQL, rows, batch_size)
+
+        # Re-index product names once, after all the batches are in
+        with self.connection:
+            self.connection.execute(REBUILD_FTS_SQL)
+        self._categories = None
+        return count
+
+    def import_orders(self, records: Iterable[Dict[str, Any]], batch_size: int = IMPORT_BATCH_SIZE) -> int:
+        """Insert or update orders from a stream of records"""
+        rows = (
+            (str(record["order_id"]).upper(), record["status"], record.get("tracking") or None, record.get("delivery_date"))
+            for record in records
+        )
+        return self._write_batches(UPSERT_ORDER_SQL, rows, batch_size)
+
+    def import_discounts(self, records: Iterable[Dict[str, Any]], batch_size: int = IMPORT_BATCH_SIZE) -> int:
+        """Insert or update discount codes from a stream of records"""
+        rows = ((str(record["code"]).upper(), float(record["rate"])) for record in records)
+        return self._write_batches(UPSERT_DISCOUNT_SQL, rows, batch_size)
+
+    def _write_batches(self, sql: str, rows: Iterable[Tuple], batch_size: int) -> int:
+        count = 0
+        for batch in _batches(rows, batch_size):
+            with self.connection:
+                self.connection.executemany(sql, batch)
+            count += len(batch)
+        return count
+
+    def seed(self, products: Dict[str, List[Dict[str, Any]]], orders: Dict[str, Dict[str, Any]], discount_codes: Dict[str, float]) -> None:
+        """Load a catalog held in Python dicts (e.g. data/mock_data)"""
+        self.import_products(
+            {"category": category, **product}
+            for category, category_products in products.items()
+            for product in category_products
+        )
+        self.import_orders({"order_id": order_id, **order} for order_id, order in orders.items())
+        self.import_discounts({"code": code, "rate": rate} for code, rate in discount_codes.items())
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import config
+
+    parser = argparse.ArgumentParser(description="Import a catalog into the SQLite catalog backend")
+    parser.add_argument("kind", choices=["products", "orders", "discounts", "seed"])
+    parser.add_argument("path", nargs="?", help="CSV or JSON Lines file to import")
+    parser.add_argument("--db", default=config.CATALOG_DB_PATH, help="SQLite database path")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    catalog = SQLiteCatalog(args.db, config.MAX_ALTERNATIVES)
+    if args.kind == "seed":
+        from data.mock_data import PRODUCT_DB, ORDERS_DB, DISCOUNT_CODES
+        catalog.seed(PRODUCT_DB, ORDERS_DB, DISCOUNT_CODES)
+        print(f"Loaded the sample catalog into {args.db}")
+        return
+    if not args.path:
+        parser.error(f"{args.kind} needs a file to import")
+
+    importers = {
+        "products": catalog.import_products,
+        "orders": catalog.import_orders,
+        "discounts": catalog.import_discounts,
+    }
+    count = importers[args.kind](read_records(args.path), args.batch_size)
+    print(f"Imported {count:,} {args.kind} into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
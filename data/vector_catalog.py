@@ -0,0 +1,171 @@
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from data.catalog_index import MIN_PREFIX_LENGTH, PREFIX_MATCH_WEIGHT, tokenize
+
+
+class VectorCatalog:
+    """
+    NumPy-backed catalog for large stores
+
+    Product names are stored as a TF-IDF term matrix in compressed sparse
+    column form (one slice of product ids and weights per term), next to
+    price, stock and category columns. A search adds up the columns of the
+    query terms into one score array and picks the top results with
+    np.argpartition, so there is no Python loop over products.
+
+    It exposes the same search() as CatalogIndex. The postings and
+    prefix_postings dicts map each word and prefix to its term id, so the
+    fuzzy matcher can use this vocabulary too.
+    """
+
+    def __init__(self, catalog: Dict[str, List[Dict[str, Any]]], index_prefixes: bool = True):
+        self.products: List[Tuple[str, Dict[str, Any]]] = [
+            (category, product)
+            for category, products in catalog.items()
+            for product in products
+        ]
+        self.positions = {product["id"]: product_id for product_id, (_, product) in enumerate(self.products)}
+        self.categories = list(catalog.keys())
+        category_codes = {category: code for code, category in enumerate(self.categories)}
+
+        # Column arrays for vectorized filtering
+        self.category_codes = np.array([category_codes[category] for category, _ in self.products], dtype=np.int32)
+        self.prices = np.array([product["price"] for _, product in self.products], dtype=np.float64)
+        self.stock = np.array([product["stock"] for _, product in self.products], dtype=np.int64)
+
+        self.postings: Dict[str, int] = {}
+        self.prefix_postings: Dict[str, int] = {}
+        self._build_term_matrix(index_prefixes)
+
+    def _build_term_matrix(self, index_prefixes: bool) -> None:
+        """Build the TF-IDF term matrix (and the prefix matrix) in CSC form"""
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        term_counts: List[int] = []
+        prefix_ids: List[int] = []
+        prefix_doc_ids: List[int] = []
+        prefix_sources: List[int] = []
+
+        for doc_id, (_, product) in enumerate(self.products):
+            counts = Counter(tokenize(product["name"]))
+            prefixes = {}
+            for token, count in counts.items():
+                term_ids.append(self.postings.setdefault(token, len(self.postings)))
+                doc_ids.append(doc_id)
+                term_counts.append(count)
+                if index_prefixes:
+                    for end in range(MIN_PREFIX_LENGTH, len(token)):
+                        # A prefix takes its weight from the first word it came from
+                        prefixes.setdefault(token[:end], len(term_ids) - 1)
+            for prefix, source in prefixes.items():
+                if prefix in counts:
+                    continue
+                prefix_ids.append(self.prefix_postings.setdefault(prefix, len(self.prefix_postings)))
+                prefix_doc_ids.append(doc_id)
+                prefix_sources.append(source)
+
+        term_ids = np.array(term_ids, dtype=np.int64)
+        doc_ids = np.array(doc_ids, dtype=np.int64)
+
+        # Smoothed IDF and L2-normalized TF-IDF weights per product
+        document_frequency = np.bincount(term_ids, minlength=len(self.postings))
+        self.idf = np.log((1 + len(self.products)) / (1 + document_frequency)) + 1
+        weights = np.array(term_counts, dtype=np.float64) * self.idf[term_ids]
+        norms = np.sqrt(np.bincount(doc_ids, weights=weights ** 2, minlength=len(self.products)))
+        weights /= np.maximum(norms[doc_ids], 1e-12)
+
+        self.term_indptr, self.term_docs, self.term_weights = self._to_csc(term_ids, doc_ids, weights, len(self.postings))
+
+        prefix_ids = np.array(prefix_ids, dtype=np.int64)
+        prefix_weights = weights[np.array(prefix_sources, dtype=np.int64)] * PREFIX_MATCH_WEIGHT
+        self.prefix_idf = np.log((1 + len(self.products)) / (1 + np.bincount(prefix_ids, minlength=len(self.prefix_postings)))) + 1
+        self.prefix_indptr, self.prefix_docs, self.prefix_weights = self._to_csc(
+            prefix_ids, np.array(prefix_doc_ids, dtype=np.int64), prefix_weights, len(self.prefix_postings)
+        )
+
+    @staticmethod
+    def _to_csc(column_ids: np.ndarray, row_ids: np.ndarray, values: np.ndarray, column_count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Group (column, row, value) triples by column"""
+        order = np.argsort(column_ids, kind="stable")
+        indptr = np.zeros(column_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(column_ids, minlength=column_count), out=indptr[1:])
+        return indptr, row_ids[order].astype(np.int32), values[order]
+
+    def update_stock(self, sku: str, stock: int) -> None:
+        """Keep the stock column in sync after a product's stock changes"""
+        product_id = self.positions[sku]
+        self.stock[product_id] = stock
+        self.products[product_id][1]["stock"] = stock
+
+    def scores(self, query: str) -> np.ndarray:
+        """Cosine similarity between the query and every product name"""
+        scores = np.zeros(len(self.products), dtype=np.float64)
+        query_weights = []
+
+        for token in dict.fromkeys(tokenize(query)):
+            term_id = self.postings.get(token)
+            if term_id is not None:
+                weight = self.idf[term_id]
+                start, end = self.term_indptr[term_id], self.term_indptr[term_id + 1]
+                # Each product appears at most once per term, so fancy-index addition is safe
+                scores[self.term_docs[start:end]] += weight * self.term_weights[start:end]
+                query_weights.append(weight)
+                continue
+
+            prefix_id = self.prefix_postings.get(token) if len(token) >= MIN_PREFIX_LENGTH else None
+            if prefix_id is not None:
+                weight = self.prefix_idf[prefix_id]
+                start, end = self.prefix_indptr[prefix_id], self.prefix_indptr[prefix_id + 1]
+                scores[self.prefix_docs[start:end]] += weight * self.prefix_weights[start:end]
+                query_weights.append(weight)
+
+        if query_weights:
+            scores /= math.sqrt(sum(weight ** 2 for weight in query_weights))
+        return scores
+
+    def search(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        limit: Optional[int] = None,
+        in_stock_only: bool = False,
+        max_price: Optional[float] = None
+    ) -> List[Tuple[str, Dict[str, Any], float]]:
+        """
+        Rank products by how well their names match the query
+
+        Args:
+            query: Free-text product query
+            category: Only return products from this category (optional)
+            limit: Maximum number of results (optional)
+            in_stock_only: Skip products that are out of stock
+            max_price: Skip products above this price (optional)
+
+        Returns:
+            A list of (category, product, relevance_score) tuples, best match first.
+            relevance_score is between 0 and 1.
+        """
+        scores = self.scores(query)
+
+        # Filters are column masks over the whole catalog
+        if category:
+            if category not in self.categories:
+                return []
+            scores[self.category_codes != self.categories.index(category)] = 0
+        if in_stock_only:
+            scores[self.stock <= 0] = 0
+        if max_price is not None:
+            scores[self.prices > max_price] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if limit and len(candidates) > limit:
+            top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            candidates = candidates[top]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        return [
+            (self.products[product_id][0], self.products[product_id][1], round(float(min(scores[product_id], 1.0)), 3))
+            for product_id in candidates
+        ]
@@ -1,13 +1,18 @@
 from fastapi import FastAPI, HTTPException, Depends, Body
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
 import os
-from langchain_groq import ChatGroq
-from langchain.memory import ConversationBufferMemory
+import json
+import asyncio
+import config as app_config
 from config import BUSINESS_CATEGORIES
 from decouple import config
-from utils import get_response, process_function_call, generate_business_description
+from utils import aget_response, astream_response, aprocess_function_call, agenerate_business_description, aclose_llm_clients, llm_coalescing_stats, create_session_store, PROMPT_TOKEN_STATS, RESPONSE_CACHE, INTENT_ROUTER
+from utils.description_cache import DESCRIPTION_CACHE, warm_business_descriptions
+from tools.consultation_tools import search_engine as consultation_search_engine
+from tools.product_tools import product_lookup_scope
 import uuid
 
 # Initialize FastAPI app
@@ -26,6 +31,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Resolve each product name at most once per request, across every tool the request runs
+@app.middleware("http")
+async def product_lookup_middleware(request, call_next):
+    with product_lookup_scope():
+        return await call_next(request)
+
 # Define Pydantic models for request/response
 class ChatRequest(BaseModel):
     message: str
@@ -45,18 +56,22 @@ class ChatResponse(BaseModel):
 class BusinessDescriptionResponse(BaseModel):
     description: str
 
-# In-memory storage for chat sessions
-chat_sessions = {}
+# Bounded in-memory storage for chat sessions (LRU + idle TTL)
+chat_sessions = create_session_store()
+
+# Look up a session in a thread when it may be read from the database, to keep the event loop free
+async def run_session_lookup(lookup, session_id: str):
+    if chat_sessions.persistence is None:
+        return lookup(session_id)
+    return await asyncio.get_running_loop().run_in_executor(None, lookup, session_id)
 
 # Helper function to get or create a chat session
-def get_chat_session(session_id: str):
-    if session_id not in chat_sessions:
-        chat_sessions[session_id] = {
-            "messages": [],
-            "memory": ConversationBufferMemory(),
-            "function_call_log": []
-        }
-    return chat_sessions[session_id]
+async def get_chat_session(session_id: str):
+    return await run_session_lookup(chat_sessions.get_or_create, session_id)
+
+# Helper function to get an existing chat session, or None
+async def find_chat_session(session_id: str):
+    return await run_session_lookup(chat_sessions.get, session_id)
 
 # Format business description (similar to the Streamlit app)
 def format_business_description(description_data):
@@ -75,36 +90,31 @@ def format_business_description(description_data):
         
     return formatted_description
 
-# Routes
-@app.get("/")
-async def root():
-    return {"message": "Welcome to Zita API. Use /docs to see available endpoints."}
+@app.on_event("startup")
+async def warm_description_cache():
+    # Generate missing business descriptions in the background so startup isn't delayed
+    if app_config.DESCRIPTION_WARMUP_ON_STARTUP:
+        asyncio.create_task(warm_business_descriptions(config("GROQ_API_KEY")))
 
-@app.post("/chat/{session_id}", response_model=ChatResponse)
-async def chat(
-    session_id: str,
-    request: ChatRequest
-):
-    # Get or create chat session
-    session = get_chat_session(session_id)
-    
-    # Use provided API key or fallback to config
-    api_key = config("GROQ_API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=400, detail="API key is required")
-    
-    # Get response from AI
-    response_text, function_call, detected_intent, error = get_response(
-        request.message,
-        api_key,
-        request.business_type,
-        session["memory"]
-    )
-    
-    # Handle error
-    if error:
-        raise HTTPException(status_code=500, detail=str(error))
-    
+@app.on_event("shutdown")
+async def close_llm_clients():
+    # Release the pooled LLM connections
+    await aclose_llm_clients()
+
+@app.on_event("shutdown")
+async def flush_chat_sessions():
+    # Write out session turns that are still queued
+    chat_sessions.close()
+
+# Combine the AI response and function result into the chat response and record the turn
+async def build_chat_result(
+    session: Dict[str, Any],
+    message: str,
+    response_text: str,
+    function_call: Optional[Dict],
+    detected_intent: Optional[str],
+    function_result: Optional[Dict]
+) -> Dict[str, Any]:
     # Initialize response
     result = {
         "response": response_text,
@@ -115,13 +125,12 @@ async def chat(
     
     # Process function call if present
     if function_call:
-        # Log the function call
-        session["function_call_log"].append(
-            f"Intent: {function_call['intent']}\nParameters: {function_call['parameters']}"
-        )
-        
-        # Execute function call
-        function_result = process_function_call(function_call)
+        # Log the function calls (a merged result lists every call the LLM asked for)
+        logged_calls = function_result.get("results", [function_call]) if function_result else [function_call]
+        for logged_call in logged_calls:
+            session["function_call_log"].append(
+                f"Intent: {logged_call['intent']}\nParameters: {logged_call['parameters']}"
+            )
         
         # Process function call result
         if function_result and "Error" not in function_result:
@@ -133,7 +142,7 @@ async def chat(
                 # Handle specific case for product availability
                 if not function_result.get("found", True) and function_call["intent"] == "check_product_availability":
                     # Try to get alternatives
-                    alt_result = process_function_call({
+                    alt_result = await aprocess_function_call({
                         "intent": "recommend_alternatives", 
                         "parameters": {
                             "product_name": function_call["parameters"]["product_name"]
@@ -166,11 +175,95 @@ async def chat(
             result["function_result"] = {"error": error_message}
     
     # Add to chat history
-    session["messages"].append({"role": "user", "content": request.message})
+    session["messages"].append({"role": "user", "content": message})
     session["messages"].append({"role": "assistant", "content": result["response"]})
     
     return result
 
+# Format a Server-Sent Event
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+# Routes
+@app.get("/")
+async def root():
+    return {"message": "Welcome to Zita API. Use /docs to see available endpoints."}
+
+@app.post("/chat/{session_id}", response_model=ChatResponse)
+async def chat(
+    session_id: str,
+    request: ChatRequest
+):
+    # Get or create chat session
+    session = await get_chat_session(session_id)
+    
+    # Use provided API key or fallback to config
+    api_key = config("GROQ_API_KEY")
+    if not api_key:
+        raise HTTPException(status_code=400, detail="API key is required")
+    
+    # Get response from AI (any function call has already been executed, once)
+    response_text, function_call, function_result, detected_intent, error = await aget_response(
+        request.message,
+        api_key,
+        request.business_type,
+        session["memory"]
+    )
+    
+    # Handle error
+    if error:
+        raise HTTPException(status_code=500, detail=str(error))
+    
+    result = await build_chat_result(
+        session,
+        request.message,
+        response_text,
+        function_call,
+        detected_intent,
+        function_result
+    )
+    chat_sessions.account(session_id)
+    
+    return result
+
+@app.post("/chat/{session_id}/stream")
+async def chat_stream(
+    session_id: str,
+    request: ChatRequest
+):
+    # Get or create chat session
+    session = await get_chat_session(session_id)
+    
+    # Use provided API key or fallback to config
+    api_key = config("GROQ_API_KEY")
+    if not api_key:
+        raise HTTPException(status_code=400, detail="API key is required")
+    
+    async def event_stream():
+        # Forward tokens and tool events as they arrive, then send the final ChatResponse
+        async for event in astream_response(
+            request.message,
+            api_key,
+            request.business_type,
+            session["memory"]
+        ):
+            if event["event"] == "response":
+                data = event["data"]
+                result = await build_chat_result(
+                    session,
+                    request.message,
+                    data["response"],
+                    data["function_call"],
+                    data["detected_intent"],
+                    data["function_result"]
+                )
+                chat_sessions.account(session_id)
+                yield format_sse("done", ChatResponse(**result).model_dump())
+            else:
+                yield format_sse(event["event"], event["data"])
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.post("/business-description", response_model=BusinessDescriptionResponse)
 async def get_business_description(request: BusinessDescriptionRequest):
     # Use provided API key or fallback to config
@@ -179,7 +272,7 @@ async def get_business_description(request: BusinessDescriptionRequest):
         raise HTTPException(status_code=400, detail="API key is required")
     
     # Generate business description
-    description_data = generate_business_description(request.business_type, api_key)
+    description_data = await agenerate_business_description(request.business_type, api_key)
     
     # Format the description
     formatted_description = format_business_description(description_data)
@@ -188,19 +281,16 @@ async def get_business_description(request: BusinessDescriptionRequest):
 
 @app.get("/chat-history/{session_id}")
 async def get_chat_history(session_id: str):
-    if session_id not in chat_sessions:
+    session = await find_chat_session(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return {"messages": chat_sessions[session_id]["messages"]}
+    return {"messages": session["messages"]}
 
 @app.delete("/chat-history/{session_id}")
 async def clear_chat_history(session_id: str):
-    if session_id in chat_sessions:
-        chat_sessions[session_id] = {
-            "messages": [],
-            "memory": ConversationBufferMemory(),
-            "function_call_log": []
-        }
+    if await find_chat_session(session_id) is not None:
+        chat_sessions.reset(session_id)
     
     return {"message": "Chat history cleared"}
 
@@ -210,10 +300,46 @@ async def get_business_categories():
 
 @app.get("/function-call-log/{session_id}")
 async def get_function_call_log(session_id: str):
-    if session_id not in chat_sessions:
+    session = await find_chat_session(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return {"function_call_log": chat_sessions[session_id]["function_call_log"]}
+    return {"function_call_log": session["function_call_log"]}
+
+@app.get("/session-stats")
+async def get_session_stats():
+    # Session store size and hit/miss/eviction counters for this worker
+    return chat_sessions.stats()
+
+@app.get("/description-cache-stats")
+async def get_description_cache_stats():
+    # Business description cache size and hit ratio for this worker
+    return DESCRIPTION_CACHE.stats()
+
+@app.get("/prompt-stats")
+async def get_prompt_stats():
+    # Prompt token histograms per section and history trimming for this worker
+    return PROMPT_TOKEN_STATS.snapshot()
+
+@app.get("/response-cache-stats")
+async def get_response_cache_stats():
+    # LLM response cache size and hit ratio for this worker
+    return RESPONSE_CACHE.stats()
+
+@app.get("/intent-router-stats")
+async def get_intent_router_stats():
+    # Messages answered without the LLM by the intent fast path for this worker
+    return INTENT_ROUTER.stats()
+
+@app.get("/llm-coalescing-stats")
+async def get_llm_coalescing_stats():
+    # LLM calls made and requests that shared an identical in-flight call for this worker
+    return llm_coalescing_stats()
+
+@app.get("/consultation-search-stats")
+async def get_consultation_search_stats():
+    # Consultation web search cache hit ratio and coalesced searches for this worker
+    return consultation_search_engine.stats()
 
 @app.post("/create-session")
 async def create_session():
@@ -221,7 +347,7 @@ async def create_session():
     session_id = str(uuid.uuid4())
     
     # Initialize the session
-    get_chat_session(session_id)
+    await get_chat_session(session_id)
     
     return {"session_id": session_id}
 
@@ -1,5 +1,5 @@
 from typing import Dict, List, Any, Optional
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 class FunctionCallParameters(BaseModel):
     """Parameters for a function call"""
@@ -57,4 +57,14 @@ class FunctionCall(BaseModel):
 class LLMResponse(BaseModel):
     """Response from the LLM"""
     response_to_user: str = Field(..., description="Response to show to the user")
-    function_call: Optional[FunctionCall] = Field(None, description="Function call to execute")
\ No newline at end of file
+    function_call: Optional[FunctionCall] = Field(None, description="Function call to execute")
+    function_calls: List[FunctionCall] = Field(default_factory=list, description="Independent function calls to execute together")
+    
+    @model_validator(mode="after")
+    def sync_function_calls(self):
+        # function_call is always the first call, and function_calls always lists every call
+        if self.function_calls and self.function_call is None:
+            self.function_call = self.function_calls[0]
+        elif self.function_call is not None and not self.function_calls:
+            self.function_calls = [self.function_call]
+        return self
\ No newline at end of file
@@ -0,0 +1,37 @@
+from data.alternatives_graph import AlternativesGraph
+
+
+def product(sku, name, price, stock=10):
+    return {"id": sku, "name": name, "price": price, "stock": stock}
+
+
+CATALOG = {
+    "skincare": [
+        product("SK1", "Vitamin C Serum", 9000, stock=0),
+        product("SK2", "Hydrating Face Serum", 9500),
+        product("SK3", "Clay Face Mask", 4000),
+    ],
+    "haircare": [
+        # Closer in name and price to SK1 than anything in skincare
+        product("HC1", "Vitamin C Hair Serum", 9000),
+    ],
+}
+
+
+def test_alternatives_stay_in_the_same_category():
+    graph = AlternativesGraph(CATALOG)
+
+    names = [alternative["name"] for alternative in graph.alternatives("SK1")]
+
+    assert "Vitamin C Hair Serum" not in names
+    assert names == ["Hydrating Face Serum", "Clay Face Mask"]
+
+
+def test_stock_changes_refresh_alternatives():
+    graph = AlternativesGraph(CATALOG)
+
+    graph.update_stock("SK2", 0)
+    assert [alternative["name"] for alternative in graph.alternatives("SK1")] == ["Clay Face Mask"]
+
+    graph.update_stock("SK2", 3)
+    assert graph.alternatives("SK1")[0] == {"name": "Hydrating Face Serum", "price": 9500, "stock": 3}
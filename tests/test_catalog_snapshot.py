@@ -0,0 +1,44 @@
+from data.catalog_snapshot import SnapshotCatalog, write_snapshot
+
+
+PRODUCTS = {
+    "skincare": [
+        {"id": "SK2", "name": "Vitamin C Serum", "price": 9000, "stock": 4},
+        {"id": "SK1", "name": "Hydrating Face Serum", "price": 9500, "stock": 2},
+        {"id": "SK3", "name": "Facial Cleanser", "price": 8500, "stock": 0},
+    ],
+}
+
+
+def build(tmp_path):
+    path = tmp_path / "catalog.snapshot"
+    write_snapshot(str(path), PRODUCTS, {"ORD123": {"status": "Shipped"}}, {"SUMMER25": 0.25})
+    return path, SnapshotCatalog(str(path))
+
+
+def test_skus_are_found_by_binary_search(tmp_path):
+    _, catalog = build(tmp_path)
+
+    assert [alternative["name"] for alternative in catalog.alternatives("SK2")] == ["Hydrating Face Serum"]
+    assert catalog.alternatives("missing") == []
+
+
+def test_stock_updates_stay_out_of_the_snapshot_file(tmp_path):
+    path, catalog = build(tmp_path)
+    before = path.read_bytes()
+
+    catalog.update_stock("SK3", 5)
+    catalog.update_stock("SK1", 0)
+
+    assert path.read_bytes() == before
+    assert [alternative["name"] for alternative in catalog.alternatives("SK2")] == ["Facial Cleanser"]
+    assert [product["name"] for product in catalog.category_alternatives("skincare")] == ["Vitamin C Serum", "Facial Cleanser"]
+    # A fresh mapping of the same file still has the built stock
+    assert SnapshotCatalog(str(path)).alternatives("SK2")[0]["name"] == "Hydrating Face Serum"
+
+
+def test_trigram_postings_are_read_from_the_snapshot(tmp_path):
+    _, catalog = build(tmp_path)
+
+    assert "serum" in catalog.trigram_postings.get(" se")
+    assert catalog.trigram_postings.get("zzz") == ()
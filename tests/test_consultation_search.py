@@ -0,0 +1,85 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tools.consultation_tools import ConsultationSearchEngine
+
+
+class FakeBackend:
+    """Search backend that counts its calls and can be slowed down"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def run(self, query: str) -> str:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return f"results for {query}"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_repeated_query_is_served_from_cache():
+    backend = FakeBackend()
+    engine = ConsultationSearchEngine(backend=backend)
+
+    first = engine.search_consultation_info("Wedding planner Lagos")
+    second = engine.search_consultation_info("wedding planner lagos!")
+
+    assert backend.calls == 1
+    assert second["results"] == first["results"]
+    # The caller's own query is kept in the result
+    assert second["query"] == "wedding planner lagos!"
+    stats = engine.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_cached_result_expires_after_ttl():
+    backend = FakeBackend()
+    engine = ConsultationSearchEngine(backend=backend, cache_ttl=60)
+    clock = engine.cache.clock = FakeClock()
+
+    engine.search_consultation_info("hair salon")
+    clock.now = 59
+    engine.search_consultation_info("hair salon")
+    assert backend.calls == 1
+
+    clock.now = 61
+    engine.search_consultation_info("hair salon")
+    assert backend.calls == 2
+
+
+def test_failed_search_is_not_cached():
+    class FailingBackend(FakeBackend):
+        def run(self, query: str) -> str:
+            super().run(query)
+            raise RuntimeError("quota exceeded")
+
+    backend = FailingBackend()
+    engine = ConsultationSearchEngine(backend=backend)
+
+    assert engine.search_consultation_info("bakery")["success"] is False
+    assert engine.search_consultation_info("bakery")["success"] is False
+    assert backend.calls == 2
+
+
+def test_concurrent_identical_queries_reach_backend_once():
+    backend = FakeBackend(delay=0.2)
+    engine = ConsultationSearchEngine(backend=backend)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda _: engine.search_consultation_info("event venue abuja"), range(16)))
+
+    assert backend.calls == 1
+    assert all(result["success"] for result in results)
+    assert engine.stats()["upstream_searches"] == 1
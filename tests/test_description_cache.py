@@ -0,0 +1,47 @@
+import json
+from utils.description_cache import BusinessDescriptionCache
+
+
+def test_saves_merge_descriptions_from_other_workers(tmp_path):
+    path = str(tmp_path / "descriptions.json")
+    first, second = BusinessDescriptionCache(path), BusinessDescriptionCache(path)
+    assert first.get("bakery") is None and second.get("salon") is None
+
+    first.put("bakery", {"description": "Bread"})
+    second.put("salon", {"description": "Hair"})
+
+    with open(path, encoding="utf-8") as f:
+        assert set(json.load(f)) == {"bakery", "salon"}
+    # The first worker reloads the file once it changes
+    assert first.get("salon") == {"description": "Hair"}
+    assert "bakery" in second
+
+
+def test_errors_are_not_cached(tmp_path):
+    cache = BusinessDescriptionCache(str(tmp_path / "descriptions.json"))
+
+    cache.put("bakery", {"error": "rate limited"})
+
+    assert "bakery" not in cache
+
+
+def test_expired_descriptions_are_misses(tmp_path):
+    now = [1000.0]
+    cache = BusinessDescriptionCache(str(tmp_path / "descriptions.json"), ttl=60, clock=lambda: now[0])
+    cache.put("bakery", {"description": "Bread"})
+
+    now[0] += 61
+
+    assert cache.get("bakery") is None
+
+
+def test_only_one_worker_warms_the_cache(tmp_path):
+    path = str(tmp_path / "descriptions.json")
+    first, second = BusinessDescriptionCache(path), BusinessDescriptionCache(path)
+
+    with first.warmup_lock() as first_acquired:
+        with second.warmup_lock() as second_acquired:
+            assert first_acquired
+            assert not second_acquired
+    with second.warmup_lock() as acquired:
+        assert acquired
@@ -0,0 +1,33 @@
+import pytest
+from utils.intent_router import IntentRouter
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter()
+
+
+@pytest.mark.parametrize("message", [
+    "track ORD123",
+    "ORD123",
+    "where is my order ORD123?",
+    "apply SUMMER25 to facial cleanser",
+    "apply SUMMER25 discount to facial cleanser",
+    "I want to use SUMMER25 on facial cleanser",
+])
+def test_explicit_requests_skip_the_llm(router, message):
+    assert router.route(message) is not None
+
+
+@pytest.mark.parametrize("message", [
+    "my order ORD123 arrived damaged",
+    "don't ship ORD123 yet, hold it",
+    "is SUMMER25 valid for the serum",
+    "my order ORD123",
+    "SUMMER25 facial cleanser",
+    "I didn't get ORD123",
+    "ORD123 hasn’t arrived",
+    "dont ship ORD123",
+])
+def test_complaints_and_vague_mentions_go_to_the_llm(router, message):
+    assert router.route(message) is None
@@ -0,0 +1,41 @@
+from utils.prompt_budget import HISTORY_SUMMARY_PREFIX, build_budgeted_prompt, count_tokens
+
+
+SYSTEM_PROMPT = "You are Zita."
+SUMMARY_LINE = HISTORY_SUMMARY_PREFIX + "The customer is buying a Peruvian Wig and has order ORD123."
+TURNS = [f"Human: question number {turn} about the wig\nAI: answer number {turn} about the wig" for turn in range(10)]
+
+
+def budget_for(history: str) -> int:
+    """Prompt ceiling that leaves exactly enough room for a given history"""
+    # Trimming counts each line plus its newline
+    history_tokens = sum(count_tokens(line) + 1 for line in history.split("\n"))
+    return count_tokens(SYSTEM_PROMPT) + count_tokens("Customer: hi\nZita:") + history_tokens
+
+
+def history_of(prompt: str) -> str:
+    return prompt[len(SYSTEM_PROMPT) + 2:prompt.rindex("\nCustomer: hi")]
+
+
+def test_oldest_turns_are_trimmed_before_the_summary():
+    history = "\n".join([SUMMARY_LINE] + TURNS)
+    kept_turns = "\n".join(TURNS[-3:])
+    prompt, sections = build_budgeted_prompt(SYSTEM_PROMPT, history, "hi", budget_for(f"{SUMMARY_LINE}\n{kept_turns}"))
+
+    assert history_of(prompt) == f"{SUMMARY_LINE}\n{kept_turns}"
+    assert sections["total"] <= budget_for(f"{SUMMARY_LINE}\n{kept_turns}")
+
+
+def test_summary_is_shortened_only_when_no_turn_is_left():
+    history = "\n".join([SUMMARY_LINE] + TURNS)
+    short_summary = HISTORY_SUMMARY_PREFIX + "The customer is buying"
+    prompt, _ = build_budgeted_prompt(SYSTEM_PROMPT, history, "hi", budget_for(short_summary))
+
+    assert history_of(prompt) == short_summary
+
+
+def test_history_without_summary_drops_oldest_lines():
+    history = "\n".join(TURNS)
+    prompt, _ = build_budgeted_prompt(SYSTEM_PROMPT, history, "hi", budget_for(TURNS[-1]))
+
+    assert history_of(prompt) == TURNS[-1]
@@ -0,0 +1,70 @@
+from langchain_core.messages import AIMessage, HumanMessage
+from utils.session_persistence import SQLiteSessionPersistence
+from utils.session_store import SessionStore
+
+
+def worker(path):
+    # A long flush interval so the tests decide when rows are written
+    return SessionStore(persistence=SQLiteSessionPersistence(str(path), flush_interval=60))
+
+
+def chat_turn(store, session_id, text):
+    session = store.get_or_create(session_id)
+    session["messages"].append({"role": "user", "content": text})
+    session["memory"].chat_memory.add_messages([HumanMessage(text), AIMessage("ok")])
+    store.account(session_id)
+
+
+def contents(session):
+    return [message["content"] for message in session["messages"]]
+
+
+def test_rehydrate_reads_queued_rows_without_flushing(tmp_path):
+    store = worker(tmp_path / "sessions.db")
+    chat_turn(store, "s1", "hi")
+    store._sessions.clear()
+
+    assert contents(store.get("s1")) == ["hi"]
+    assert store.persistence.stats()["pending_rows"] == 3
+
+
+def test_session_changed_by_another_worker_is_resynced(tmp_path):
+    first, second = worker(tmp_path / "sessions.db"), worker(tmp_path / "sessions.db")
+    chat_turn(first, "s1", "hi")
+    first.persistence.flush()
+
+    chat_turn(second, "s1", "from the other worker")
+    second.persistence.flush()
+
+    assert contents(first.get("s1")) == ["hi", "from the other worker"]
+    assert first.stats()["resyncs"] == 1
+    # Its own writes don't make a session look stale
+    chat_turn(first, "s1", "again")
+    first.get("s1")
+    assert first.stats()["resyncs"] == 1
+
+
+def test_stale_check_does_not_wait_for_the_writer(tmp_path):
+    store = worker(tmp_path / "sessions.db")
+    chat_turn(store, "s1", "hi")
+
+    # Simulate a flush in progress: the check must not block on it
+    with store.persistence._flush_lock:
+        store.persistence._write_generation += 1
+        assert store.persistence.is_current("s1")
+        store.persistence._write_generation += 1
+
+
+def test_rolling_summary_is_persisted(tmp_path):
+    first, second = worker(tmp_path / "sessions.db"), worker(tmp_path / "sessions.db")
+    chat_turn(first, "s1", "hi")
+    chat_turn(first, "s1", "my order is ORD123")
+    memory = first.get("s1")["memory"]
+    memory.summary = "The customer asked about ORD123."
+    memory.summarized_count = 2
+    first.account("s1")
+    first.persistence.flush()
+
+    memory = second.get("s1")["memory"]
+    assert memory.summary == "The customer asked about ORD123."
+    assert memory.summarized_count == 2
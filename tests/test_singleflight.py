@@ -0,0 +1,93 @@
+import asyncio
+from utils.singleflight import AsyncSingleFlight
+
+
+class SlowCall:
+    """Upstream call that counts how often it starts and whether it was cancelled"""
+
+    def __init__(self, result="done", error=None, delay=0.05):
+        self.result = result
+        self.error = error
+        self.delay = delay
+        self.started = 0
+        self.cancelled = False
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+async def start_callers(flight, call, count):
+    callers = [asyncio.create_task(flight.do("key", call)) for _ in range(count)]
+    # Let every caller join the flight
+    await asyncio.sleep(0.01)
+    return callers
+
+
+def test_first_caller_cancelled_while_others_wait():
+    async def scenario():
+        flight, call = AsyncSingleFlight(), SlowCall()
+        first, *others = await start_callers(flight, call, 3)
+
+        first.cancel()
+        results = await asyncio.gather(first, *others, return_exceptions=True)
+
+        assert isinstance(results[0], asyncio.CancelledError)
+        assert results[1:] == ["done", "done"]
+        assert call.started == 1
+        assert not call.cancelled
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_all_callers_cancelled_cancels_the_call():
+    async def scenario():
+        flight, call = AsyncSingleFlight(), SlowCall()
+        callers = await start_callers(flight, call, 3)
+
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert call.cancelled
+        assert flight.stats()["in_flight"] == 0
+        # A later caller starts a fresh call
+        assert await flight.do("key", SlowCall(result="again")) == "again"
+
+    asyncio.run(scenario())
+
+
+def test_exception_reaches_every_waiter():
+    async def scenario():
+        flight, call = AsyncSingleFlight(), SlowCall(error=ValueError("upstream failed"))
+        callers = await start_callers(flight, call, 3)
+
+        results = await asyncio.gather(*callers, return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert call.started == 1
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_max_waiters_overflow_makes_its_own_call():
+    async def scenario():
+        flight = AsyncSingleFlight(max_waiters=1)
+        call = SlowCall()
+        callers = await start_callers(flight, call, 3)
+
+        assert await asyncio.gather(*callers) == ["done"] * 3
+        assert call.started == 2
+        assert flight.stats()["overflow"] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,74 @@
+import json
+from utils.stream_parser import LLMResponseStreamParser
+
+
+def feed_by_char(completion: str):
+    """Feed a completion one character at a time and return the parser and every event"""
+    parser = LLMResponseStreamParser()
+    events = []
+    for char in completion:
+        events.extend(parser.feed(char))
+    return parser, events
+
+
+def streamed_text(events) -> str:
+    return "".join(data for kind, data in events if kind == "text")
+
+
+def test_text_is_streamed_character_by_character():
+    completion = json.dumps({"response_to_user": "Hello \"friend\",\nhow far?", "function_call": None})
+    parser, events = feed_by_char(completion)
+
+    assert streamed_text(events) == "Hello \"friend\",\nhow far?"
+    assert parser.response_text == "Hello \"friend\",\nhow far?"
+    assert parser.response_complete
+    assert parser.complete
+    assert parser.function_call is None
+    assert parser.function_calls == []
+
+
+def test_unicode_escapes_and_surrogate_pairs():
+    # json.dumps escapes "₦" as \u20a6 and the emoji as a \ud83d\ude0a surrogate pair
+    completion = json.dumps({"response_to_user": "Price: ₦8,500 😊", "function_call": None})
+    assert "\\ud83d\\ude0a" in completion
+
+    parser, events = feed_by_char(completion)
+
+    assert streamed_text(events) == "Price: ₦8,500 😊"
+
+
+def test_prose_around_the_json_is_skipped():
+    envelope = json.dumps({
+        "response_to_user": "Let me check {that} for you.",
+        "function_call": {"intent": "track_order", "parameters": {"order_id": "ORD123"}}
+    })
+    completion = "Sure {not json} here you go:\n" + envelope + "\nHope that helps {}!"
+    parser, events = feed_by_char(completion)
+
+    assert streamed_text(events) == "Let me check {that} for you."
+    assert parser.function_call == {"intent": "track_order", "parameters": {"order_id": "ORD123"}}
+    assert parser.complete
+    # Nothing after the envelope is reported
+    assert [kind for kind, _ in events].count("function_call") == 1
+
+
+def test_function_calls_list_reports_each_call_in_order():
+    calls = [
+        {"intent": "track_order", "parameters": {"order_id": "ORD123"}},
+        {"intent": "check_product_availability", "parameters": {"product_name": "facial cleanser"}},
+    ]
+    completion = json.dumps({"response_to_user": "Checking both.", "function_calls": calls})
+    parser, events = feed_by_char(completion)
+
+    assert [data for kind, data in events if kind == "function_call"] == calls
+    assert parser.function_calls == calls
+    assert parser.function_call == calls[0]
+    # The text comes before the calls, as in the completion
+    assert events[0][0] == "text"
+
+
+def test_function_call_without_parameters_gets_empty_parameters():
+    completion = json.dumps({"response_to_user": "Hi", "function_call": {"intent": "recommend_alternatives"}})
+    parser, _ = feed_by_char(completion)
+
+    assert parser.function_call == {"intent": "recommend_alternatives", "parameters": {}}
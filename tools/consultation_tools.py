@@ -5,8 +5,11 @@ from models.schemas import ConsultationParams
 from langchain_community.utilities import GoogleSearchAPIWrapper
 import os
 import json
+import threading
 from datetime import datetime
 import config
+from utils.response_cache import TTLCache, normalize_text
+from utils.singleflight import SingleFlight
 
 google_api_key= config.GOOGLE_API_KEY
 google_cse_id= config.GOOGLE_CSE_ID
@@ -15,12 +18,43 @@ google_cse_id= config.GOOGLE_CSE_ID
 class ConsultationSearchEngine:
     """Handles Google Search operations for consultations"""
     
-    def __init__(self, google_api_key: str, google_cse_id: str):
-        self.search = GoogleSearchAPIWrapper(
-            google_api_key=google_api_key,
-            google_cse_id=google_cse_id,
-            k=1  # Number of search results
-        )
+    def __init__(
+        self,
+        google_api_key: Optional[str] = None,
+        google_cse_id: Optional[str] = None,
+        backend: Optional[Any] = None,
+        cache_ttl: float = 3600,
+        cache_max_entries: int = 1024
+    ):
+        """
+        Args:
+            google_api_key: Google API key for the default Google CSE backend
+            google_cse_id: Google Custom Search Engine ID for the default backend
+            backend: Any object with run(query) -> str to search with instead of Google
+            cache_ttl: Seconds a successful search result is reused
+            cache_max_entries: Most search results kept in the cache
+        """
+        self.google_api_key = google_api_key
+        self.google_cse_id = google_cse_id
+        self._backend = backend
+        self._backend_lock = threading.Lock()
+        
+        # Results by normalized query, and one upstream search per query at a time
+        self.cache = TTLCache(max_entries=cache_max_entries, ttl=cache_ttl)
+        self.in_flight = SingleFlight()
+    
+    @property
+    def search(self):
+        """The search backend (the Google wrapper is created on first use, so missing keys don't break imports)"""
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = GoogleSearchAPIWrapper(
+                        google_api_key=self.google_api_key,
+                        google_cse_id=self.google_cse_id,
+                        k=1  # Number of search results
+                    )
+        return self._backend
     
     def generate_search_query(self, params: ConsultationParams) -> str:
         """Generate search query based on consultation parameters"""
@@ -46,7 +80,7 @@ class ConsultationSearchEngine:
             query_parts.append(params.description)
 
         if params.budget:
-            query_parts.append(params.budget)
+            query_parts.append(str(params.budget))
 
         if params.currency:
             query_parts.append(params.currency)
@@ -54,15 +88,32 @@ class ConsultationSearchEngine:
         return " ".join(query_parts)
     
     def search_consultation_info(self, query: str) -> Dict[str, Any]:
-        """Perform Google search and return structured results"""
+        """Perform Google search and return structured results, reusing recent results for the same query"""
+        cache_key = normalize_text(query)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return dict(cached, query=query)
+        
+        # Identical searches that miss at the same time share one upstream request
+        result = self.in_flight.do(cache_key, lambda: self._search_upstream(cache_key, query))
+        return dict(result, query=query)
+    
+    def _search_upstream(self, cache_key: str, query: str) -> Dict[str, Any]:
+        """Run the search on the backend and cache a successful result"""
+        # A search that just finished may have cached this query after our cache miss
+        cached = self.cache.peek(cache_key)
+        if cached is not None:
+            return cached
         try:
             results = self.search.run(query)
-            return {
+            result = {
                 "success": True,
                 "query": query,
                 "results": results,
                 "timestamp": datetime.now().isoformat()
             }
+            self.cache.put(cache_key, result)
+            return result
         except Exception as e:
             return {
                 "success": False,
@@ -70,6 +121,19 @@ class ConsultationSearchEngine:
                 "error": str(e),
                 "timestamp": datetime.now().isoformat()
             }
+    
+    def stats(self) -> Dict[str, Any]:
+        """Search cache hit ratio and how many searches were shared by concurrent callers"""
+        return dict(self.cache.stats(), upstream_searches=self.in_flight.calls, coalesced_searches=self.in_flight.shared)
+
+
+# Shared search engine used by the consultation tool
+search_engine = ConsultationSearchEngine(
+    google_api_key,
+    google_cse_id,
+    cache_ttl=config.CONSULTATION_CACHE_TTL,
+    cache_max_entries=config.CONSULTATION_CACHE_MAX_ENTRIES
+)
 
 
 def generate_consultation_response(params: ConsultationParams, search_results: Dict[str, Any]) -> str:
@@ -128,7 +192,7 @@ def consultation_service(
         description=description,
         location=location,
         budget=budget,
-        currency=float(currency),
+        currency=currency,
         purpose=purpose
     )
     
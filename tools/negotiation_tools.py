@@ -1,27 +1,35 @@
-from typing import Dict, Any, Optional
+import asyncio
+import contextvars
+import zlib
+from functools import partial
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from langchain_core.tools import tool
+import config
+from utils.llm_client import get_llm
 
 #from Zita.app import business_type
-from product_tools import check_product_availability
+from tools.product_tools import lookup_product
 
 
 
-@tool
-def handle_negotiation(product_name: str, offered_price: float, max_price: Optional[float] = None, min_price: Optional[float] = None) -> Dict[str, Any]:
-    """Handle price negotiations for products"""
-    product_info = check_product_availability(product_name)
+def _prepare_negotiation(product_name: str, offered_price: float, max_price: Optional[float] = None, min_price: Optional[float] = None) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Look up the product and work out the price bounds
+
+    Returns (early_result, negotiation): early_result is set when there is nothing to negotiate.
+    """
+    product_info = lookup_product(product_name)
     
     if not product_info["found"]:
         return {
             "success": False,
             "message": product_info["message"]
-        }
+        }, None
     
     if not product_info["available"]:
         return {
             "success": False,
             "message": f"Sorry, {product_info['product']} is currently out of stock. Would you like to see some alternatives?"
-        }
+        }, None
     
     original_price = product_info["price"]
     max_price = max_price if max_price is not None else original_price
@@ -31,48 +39,59 @@ def handle_negotiation(product_name: str, offered_price: float, max_price: Optio
     
     discount_percentage = ((original_price - offered_price) / original_price) * 100
     
-    # Prepare negotiation context for LLM
-    negotiation_prompt = f"""
-        You are Zita, a sharp Nigerian seller that can switch between pidgin and Nigerian English based on user input, help negotiate the price for {product_info['product']} in a way that's both friendly and persuasive.
-
-        Product info:
-        - Original price: ₦{original_price:,}
-        - Customer's offer: ₦{offered_price:,}
-        - Minimum acceptable price: ₦{min_price:,}
-        - Maximum price: ₦{max_price:,}
-        - Discount percentage: {discount_percentage:.1f}%
-
-        Your negotiation style:
-        - Be street-smart, witty, and warm — like a trusted vendor at a Lagos market or popular online store.
-        - If chatting in Pidgin, feel free to sprinkle in common phrases like *"abeg"*, *"no vex"*, *"e go better for you"*, *"na last price be this o"*, etc.
-        - If in English, sound friendly and playful but professional — never too stiff.
-
-        Negotiation logic (but don’t reveal it directly):
-        1. If offer ≥ max_price:
-        - Accept quickly and thank the customer warmly. Maybe say “You sabi better thing!” or “Nice one! You go enjoy am.”
-        2. If min_price ≤ offer < max_price:
-        - Accept or make a soft counter-offer. Say something like: “Ah, you sharp, but top ₦500 go make sense for me abeg.”
-        3. If offer < min_price:
-        - Decline sweetly but push your lowest. Use charm: “Chai! I for love run you am, but the price na blood. ₦{min_price:,} na my last — no shaking.”
-
-        Additional tips:
-        - Suggest bundles, delivery, or small bonus if it helps close the deal.
-        - Make customer feel smart, appreciated, and like they’re winning — even when you push back.
-
-        DO NOT mention pricing logic or thresholds explicitly. Keep your tone human and real. The goal is to close the deal like a Naija seller who knows how to read people.
-
-        Example response:
-        "Ah oga, your offer dey nice o, but make I talk true — ₦{min_price:,} na the very bottom. Na correct item be this, you no go regret am. I fit add small delivery bonus for you too, how you see am?"
-    """
+    return None, {
+        "product": product_info["product"],
+        "original_price": original_price,
+        "max_price": max_price,
+        "min_price": min_price,
+        "offered_price": offered_price,
+        "discount_percentage": discount_percentage
+    }
 
-    
-    # Get LLM response for negotiation
-    response_text, _, _ = get_response(negotiation_prompt, api_key, "e-commerce")
+
+# Zita's replies for each negotiation decision, in English and Pidgin.
+# Placeholders: product, offered_price, final_price, min_price, original_price, discount_percentage
+NEGOTIATION_TEMPLATES: Dict[str, List[str]] = {
+    # Offer at or above the maximum price
+    "accept": [
+        "You sabi better thing! ₦{final_price:,.0f} for the {product} na deal. You go enjoy am!",
+        "Nice one! We can do the {product} for ₦{final_price:,.0f}. Thank you for shopping with us!",
+        "Deal! The {product} is yours for ₦{final_price:,.0f}. You made a great choice.",
+    ],
+    # Offer in the top of the negotiable range
+    "accept_offer": [
+        "Ah, you sharp o! Oya, ₦{final_price:,.0f} for the {product} — e go better for you. That na {discount_percentage:.1f}% discount!",
+        "Great news! We can accept your offer of ₦{final_price:,.0f} for the {product}. That's a {discount_percentage:.1f}% discount!",
+        "You too get eye for correct market! ₦{final_price:,.0f} for the {product} don set. Make I package am for you?",
+    ],
+    # Offer in the negotiable range, answered with a counter-offer
+    "counter": [
+        "Ah oga, ₦{offered_price:,.0f} dey try, but make I talk true — ₦{final_price:,.0f} na the best I fit do for the {product}. How you see am?",
+        "Thank you for your offer of ₦{offered_price:,.0f} for the {product}. The best we can do is ₦{final_price:,.0f}. Would that work for you?",
+        "You near o! Add small make e reach ₦{final_price:,.0f} and the {product} na your own. Na correct item be this, you no go regret am.",
+    ],
+    # Offer below the minimum price
+    "decline": [
+        "Chai! I for love run am for you, but ₦{offered_price:,.0f} no reach for the {product}. ₦{min_price:,.0f} na my last — no shaking.",
+        "Thank you for your interest in the {product}. Your offer of ₦{offered_price:,.0f} is below what we can accept, but we could consider an offer of at least ₦{min_price:,.0f}. Would you like to make another offer?",
+        "Abeg no vex, ₦{offered_price:,.0f} too low for the {product}. The price na ₦{original_price:,.0f}, but for you I fit come down reach ₦{min_price:,.0f}.",
+    ],
+}
+
+
+def _negotiation_outcome(negotiation: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply the pricing logic to a prepared negotiation (no LLM involved)"""
+    original_price = negotiation["original_price"]
+    max_price = negotiation["max_price"]
+    min_price = negotiation["min_price"]
+    offered_price = negotiation["offered_price"]
+    discount_percentage = negotiation["discount_percentage"]
     
     # Determine negotiation outcome
     if offered_price >= max_price:
         final_price = max_price
         success = True
+        decision = "accept"
     elif offered_price >= min_price:
         # If offer is close to min price (in the bottom 20% of range), accept it
         price_range = max_price - min_price
@@ -80,23 +99,26 @@ def handle_negotiation(product_name: str, offered_price: float, max_price: Optio
         if offer_position >= 0.8:
             final_price = offered_price
             success = True
+            decision = "accept_offer"
         else:
             counter_position = 0.7 - (offer_position * 0.5)
             counter_position = max(0.1, min(counter_position, 0.9))
             final_price = min_price + (price_range * counter_position)
             success = True
+            decision = "counter"
     else:
         success = False
         final_price = None
+        decision = "decline"
     
     result = {
         "success": success,
-        "product": product_info["product"],
+        "decision": decision,
+        "product": negotiation["product"],
         "original_price": original_price,
         "max_price": max_price,
         "min_price": min_price,
-        "offered_price": offered_price,
-        "message": response_text
+        "offered_price": offered_price
     }
     
     if final_price is not None:
@@ -107,16 +129,79 @@ def handle_negotiation(product_name: str, offered_price: float, max_price: Optio
     if success and final_price == offered_price:
         result["discount_percentage"] = discount_percentage
     
+    result["message"] = render_negotiation_message(result)
     return result
 
 
+def render_negotiation_message(result: Dict[str, Any]) -> str:
+    """Zita's reply for a negotiation decision, from the template bank"""
+    templates = NEGOTIATION_TEMPLATES[result["decision"]]
+    # The same offer always gets the same wording
+    template = templates[zlib.crc32(f"{result['product']}|{result['offered_price']}".encode("utf-8")) % len(templates)]
+    return template.format(
+        product=result["product"],
+        offered_price=result["offered_price"],
+        final_price=result.get("final_price") or 0,
+        min_price=result["min_price"],
+        original_price=result["original_price"],
+        discount_percentage=result.get("discount_percentage", 0)
+    )
 
 
+def negotiation_persona_prompt(result: Dict[str, Any]) -> str:
+    """Prompt for an LLM-written reply that announces an already decided negotiation outcome"""
+    if result["decision"] == "decline":
+        outcome = f"Decline the offer sweetly and say ₦{result['min_price']:,.0f} is your lowest price."
+    elif result["decision"] == "counter":
+        outcome = f"Make a counter-offer of exactly ₦{result['final_price']:,.0f}."
+    else:
+        outcome = f"Accept the deal at exactly ₦{result['final_price']:,.0f} and thank the customer warmly."
+    
+    return f"""
+        You are Zita, a sharp Nigerian seller that can switch between pidgin and Nigerian English, negotiating the price for {result['product']}.
+        The customer offered ₦{result['offered_price']:,.0f} (original price ₦{result['original_price']:,.0f}).
+
+        {outcome}
 
+        Be street-smart, witty, and warm — like a trusted vendor at a Lagos market or popular online store.
+        You may suggest bundles, delivery, or a small bonus. Make the customer feel smart and appreciated.
+        Never mention any other price, pricing logic or thresholds. Reply with the message to the customer only, in two or three sentences.
+    """
 
 
+async def astream_negotiation_persona(result: Dict[str, Any], api_key: str) -> AsyncIterator[str]:
+    """Stream an LLM-written reply for a decided negotiation (see NEGOTIATION_PERSONA_MODE)"""
+    llm = get_llm(api_key)
+    async for chunk in llm.astream(negotiation_persona_prompt(result)):
+        if chunk.content:
+            yield chunk.content
 
 
+@tool
+def handle_negotiation(product_name: str, offered_price: float, max_price: Optional[float] = None, min_price: Optional[float] = None) -> Dict[str, Any]:
+    """Handle price negotiations for products"""
+    early_result, negotiation = _prepare_negotiation(product_name, offered_price, max_price, min_price)
+    if early_result:
+        return early_result
+    
+    return _negotiation_outcome(negotiation)
+
+
+@tool
+async def ahandle_negotiation(product_name: str, offered_price: float, max_price: Optional[float] = None, min_price: Optional[float] = None) -> Dict[str, Any]:
+    """Handle price negotiations for products without blocking the event loop"""
+    # The product lookup hits the catalog backend, so it runs on the tool pool (with this request's lookup cache)
+    from utils.helpers import TOOL_EXECUTOR
+
+    loop = asyncio.get_running_loop()
+    early_result, negotiation = await loop.run_in_executor(
+        TOOL_EXECUTOR,
+        partial(contextvars.copy_context().run, _prepare_negotiation, product_name, offered_price, max_price, min_price)
+    )
+    if early_result:
+        return early_result
+    
+    return _negotiation_outcome(negotiation)
 
 
 # @tool
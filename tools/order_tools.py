@@ -1,14 +1,13 @@
 from typing import Dict, Any
 from langchain_core.tools import tool
-from data.mock_data import ORDERS_DB
+from data.catalog_backend import get_catalog
 
 @tool
 def track_order(order_id: str) -> Dict[str, Any]:
     """Track the status of an order"""
     order_id = order_id.upper()
-    if order_id in ORDERS_DB:
-        order = ORDERS_DB[order_id]
-        
+    order = get_catalog().get_order(order_id)
+    if order is not None:
         if order["status"] == "delivered":
             message = f"Order {order_id} was delivered on {order['delivery_date']}."
         elif order["status"] == "shipped":
@@ -1,65 +1,188 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
 from langchain_core.tools import tool
-from data.mock_data import PRODUCT_DB
+import config
+from data.catalog_backend import CatalogBackend, get_catalog
+from data.catalog_index import tokenize, word_trigrams
 
-@tool
-def enhance_product_search_with_llm(product_query: str, category: Optional[str] = None) -> Dict[str, Any]:
-    """Use LLM to find the best matching product for a natural language query"""
-    from data.mock_data import PRODUCT_DB
+
+def _edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two words"""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        previous = current
+    return previous[-1]
+
+
+class FuzzyTokenMatcher:
+    """Trigram index over catalog words that finds the closest word to a misspelling"""
     
-    # Prepare the prompt for the LLM
-    prompt = f"Given the product query: '{product_query}', find the best matching products from the following categories and items:\n\n"
+    def __init__(self, catalog: CatalogBackend):
+        self.catalog = catalog
+        # A catalog with its own trigram index (the memory-mapped snapshot) is read in place
+        shared_postings = getattr(catalog, "trigram_postings", None)
+        if shared_postings is not None:
+            self.trigram_postings = shared_postings
+            return
+        self.trigram_postings: Dict[str, List[str]] = defaultdict(list)
+        for word in catalog.vocabulary():
+            for trigram in set(word_trigrams(word)):
+                self.trigram_postings[trigram].append(word)
     
-    # Add category-specific context if provided
-    if category and category in PRODUCT_DB:
-        products = PRODUCT_DB[category]
-        prompt += f"Category: {category}\nProducts: {products}\n"
-    else:
-        # Include all categories
-        prompt += "Available categories and products:\n"
-        for cat, products in PRODUCT_DB.items():
-            prompt += f"\n{cat.capitalize()}:\n"
-            for product in products:
-                prompt += f"- {product['name']} (${product['price']/100:.2f})\n"
+    def best_match(self, token: str, max_candidates: int = 10) -> Optional[Tuple[str, float]]:
+        """Return (word, similarity) for the closest catalog word, if there is one"""
+        shared = Counter()
+        for trigram in set(word_trigrams(token)):
+            shared.update(self.trigram_postings.get(trigram, ()))
+        
+        # Only the words sharing the most trigrams are worth an edit distance
+        best = None
+        for word, _ in shared.most_common(max_candidates):
+            similarity = 1 - _edit_distance(token, word) / max(len(token), len(word))
+            if best is None or similarity > best[1]:
+                best = (word, similarity)
+        return best
     
-    prompt += "\nPlease analyze the query and return:\n"
-    prompt += "1. The best matching products\n"
-    prompt += "2. Why these products match the query\n"
-    prompt += "3. Any alternative suggestions\n"
+    def correct(self, query: str, threshold: float) -> Tuple[str, List[Dict[str, Any]]]:
+        """Replace words that aren't in the catalog with their closest catalog word"""
+        corrected = []
+        corrections = []
+        for token in tokenize(query):
+            if len(token) >= 3 and not self.catalog.is_known_word(token):
+                match = self.best_match(token)
+                if match and match[1] >= threshold:
+                    corrections.append({"original": token, "corrected": match[0], "similarity": round(match[1], 3)})
+                    token = match[0]
+            corrected.append(token)
+        return " ".join(corrected), corrections
+
+
+# Catalog the tools read from and a fuzzy matcher over its words, built once at import
+PRODUCT_CATALOG = get_catalog()
+PRODUCT_FUZZY_MATCHER = FuzzyTokenMatcher(PRODUCT_CATALOG)
+
+
+# Product searches already resolved in the current request, by (query, category)
+_REQUEST_PRODUCT_LOOKUPS: ContextVar[Optional[Dict[Tuple[str, Optional[str]], Dict[str, Any]]]] = ContextVar(
+    "request_product_lookups", default=None
+)
+
+
+@contextmanager
+def product_lookup_scope() -> Iterator[None]:
+    """
+    Resolve each product query at most once inside this block (e.g. one chat request)
+    
+    Tools called in the block share the results, so a cascade like
+    apply_discount -> lookup_product -> find_products searches once per
+    product name. Nested scopes share the outermost one.
+    """
+    if _REQUEST_PRODUCT_LOOKUPS.get() is not None:
+        yield
+        return
+    token = _REQUEST_PRODUCT_LOOKUPS.set({})
+    try:
+        yield
+    finally:
+        _REQUEST_PRODUCT_LOOKUPS.reset(token)
+
+
+def _forget_request_lookups() -> None:
+    # The catalog changed, so results resolved earlier in this request may be stale
+    lookups = _REQUEST_PRODUCT_LOOKUPS.get()
+    if lookups:
+        lookups.clear()
+
+
+def rebuild_product_index() -> None:
+    """Rebuild the product indexes after products are added, removed or renamed"""
+    global PRODUCT_FUZZY_MATCHER
+    if hasattr(PRODUCT_CATALOG, "rebuild"):
+        PRODUCT_CATALOG.rebuild()
+    PRODUCT_FUZZY_MATCHER = FuzzyTokenMatcher(PRODUCT_CATALOG)
+    _forget_request_lookups()
+
+
+def update_stock(sku: str, stock: int) -> None:
+    """Update a product's stock and the indexes that depend on it"""
+    PRODUCT_CATALOG.update_stock(sku, stock)
+    _forget_request_lookups()
+
+
+def find_products(product_query: str, category: Optional[str] = None) -> Dict[str, Any]:
+    """Find the products that best match a natural language query, best match first"""
+    lookups = _REQUEST_PRODUCT_LOOKUPS.get()
+    if lookups is None:
+        return _find_products(product_query, category)
+    
+    key = (" ".join(product_query.lower().split()), category.lower() if category else None)
+    result = lookups.get(key)
+    if result is None:
+        result = lookups[key] = _find_products(product_query, category)
+    # Callers may add keys to the result, so each gets its own copy
+    return dict(result)
+
+
+def _find_products(product_query: str, category: Optional[str] = None) -> Dict[str, Any]:
+    # Only filter by category if it is one we sell
+    if category:
+        category = category.lower()
+        if category not in PRODUCT_CATALOG.categories():
+            category = None
     
     try:
-        # Send prompt to LLM (replace with your actual LLM call)
-        # For example: response = llm.generate(prompt)
+        # Correct misspelled words ("wigg", "see") before searching
+        corrected_query, corrections = PRODUCT_FUZZY_MATCHER.correct(product_query, config.FUZZY_MATCH_THRESHOLD)
         
-        # Process LLM response and find matching products
-        matches = []
-        for cat, products in PRODUCT_DB.items():
-            if category and category != cat:
-                continue
-            
-            for product in products:
-                # Here you would use the LLM's response to determine matches
-                # For now, we'll do a simple text matching
-                if any(word.lower() in product['name'].lower() for word in product_query.split()):
-                    matches.append({
-                        "category": cat,
-                        "product": product,
-                        "relevance_score": 0.8,  # This would come from LLM
-                        "reason": f"Product name matches query terms",  # This would come from LLM
-                    })
+        if corrections:
+            # Rank corrected matches by how confident the corrections are
+            confidence = min(correction["similarity"] for correction in corrections)
+            reason = "Closest match for " + ", ".join(
+                f"'{correction['original']}' ('{correction['corrected']}')" for correction in corrections
+            )
+        else:
+            confidence = 1.0
+            reason = "Product name matches query terms"
+        
+        matches = [
+            {
+                "category": cat,
+                "product": product,
+                "relevance_score": round(relevance_score * confidence, 3),
+                "reason": reason,
+            }
+            for cat, product, relevance_score in PRODUCT_CATALOG.search(corrected_query, category, config.PRODUCT_SEARCH_MAX_RESULTS)
+        ]
         
         if matches:
+            # Summarize the best match the same way a direct lookup does
+            best_match = matches[0]["product"]
+            available = best_match["stock"] > 0
             return {
                 "found": True,
                 "matches": matches,
                 "alternatives": [p for p in matches[1:] if p["relevance_score"] > 0.5],
-                "query_understanding": "Product search based on name matching"  # This would come from LLM
+                "query_understanding": "Product search based on name matching",
+                "product": best_match["name"],
+                "price": best_match["price"],
+                "available": available,
+                "stock": best_match["stock"],
+                "message": f"Found {best_match['name']} - ₦{best_match['price']:,}. {'In stock' if available else 'Out of stock'}"
             }
         
         return {
             "found": False,
             "suggestion": "No matching products found. Consider browsing our categories: " + 
-                         ", ".join(PRODUCT_DB.keys())
+                         ", ".join(PRODUCT_CATALOG.categories())
         }
         
     except Exception as e:
@@ -69,62 +192,38 @@ def enhance_product_search_with_llm(product_query: str, category: Optional[str]
             "suggestion": "An error occurred while processing your request. Please try again."
         }
 
-@tool
-def check_product_availability(product_name: str, category: Optional[str] = None) -> Dict[str, Any]:
+
+def lookup_product(product_name: str, category: Optional[str] = None) -> Dict[str, Any]:
     """Check if a product is available and return its details"""
-    product_name = product_name.lower()
-    
-    # Use LLM to enhance search capabilities
-    # This could be a separate function call to your LLM
-    enhanced_search_results = enhance_product_search_with_llm(product_name, category)
+    search_results = find_products(product_name, category)
     
-    # If LLM found a good match, return it
-    if enhanced_search_results.get("found"):
-        return enhanced_search_results
-    
-    # Fallback to traditional search if LLM doesn't find a match
-    # Search in specific category if provided
-    if category and category.lower() in PRODUCT_DB:
-        categories = [category.lower()]
-    else:
-        categories = PRODUCT_DB.keys()
-    
-    for cat in categories:
-        for product in PRODUCT_DB[cat]:
-            if product_name in product["name"].lower():
-                available = product["stock"] > 0
-                return {
-                    "found": True,
-                    "product": product["name"],
-                    "price": product["price"],
-                    "available": available,
-                    "stock": product["stock"],
-                    "message": f"Found {product['name']} - ₦{product['price']:,}. {'In stock' if available else 'Out of stock'}"
-                }
+    if search_results.get("found"):
+        return search_results
     
     return {
         "found": False,
-        "message": f"Sorry, I couldn't find {product_name} in our inventory."
+        "message": f"Sorry, I couldn't find {product_name.lower()} in our inventory."
     }
 
 
+@tool
+def enhance_product_search_with_llm(product_query: str, category: Optional[str] = None) -> Dict[str, Any]:
+    """Use LLM to find the best matching product for a natural language query"""
+    return find_products(product_query, category)
+
+@tool
+def check_product_availability(product_name: str, category: Optional[str] = None) -> Dict[str, Any]:
+    """Check if a product is available and return its details"""
+    return lookup_product(product_name, category)
+
+
 @tool
 def recommend_alternatives(product_name: str) -> Dict[str, Any]:
     """Recommend alternative products when a requested item is out of stock"""
     # First check if the product exists
-    product_info = check_product_availability(product_name)
-    
-    # Extract keywords from the product name
-    keywords = product_name.lower().split()
-    
-    # Find potential category based on keywords
-    potential_category = None
-    for category in PRODUCT_DB.keys():
-        if any(keyword in category.lower() for keyword in keywords):
-            potential_category = category
-            break
+    product_info = lookup_product(product_name)
     
-    # If we found an exact match but it's out of stock, use its category
+    # If we found the product, its precomputed neighbours are the alternatives
     if product_info.get("found", False):
         # If product exists and is in stock, no need for alternatives
         if product_info.get("available", False):
@@ -133,50 +232,17 @@ def recommend_alternatives(product_name: str) -> Dict[str, Any]:
                 "message": f"{product_info['product']} is available in stock, no alternatives needed."
             }
         
-        # Find the category the product belongs to
-        for category, products in PRODUCT_DB.items():
-            for product in products:
-                if product_name.lower() in product["name"].lower():
-                    potential_category = category
-                    break
-            if potential_category:
-                break
-    
-    # If we still don't have a category, try to find the most relevant one
-    if not potential_category:
-        # Count matches in each category
-        category_matches = {}
-        for category, products in PRODUCT_DB.items():
-            matches = 0
-            for product in products:
-                product_lower = product["name"].lower()
-                for keyword in keywords:
-                    if keyword in product_lower:
-                        matches += 1
-            if matches > 0:
-                category_matches[category] = matches
-        
-        # Get the category with the most matches
-        if category_matches:
-            potential_category = max(category_matches.items(), key=lambda x: x[1])[0]
-        else:
-            # If no matches, just pick the first category as a fallback
-            potential_category = list(PRODUCT_DB.keys())[0]
-    
-    # Find alternatives in the potential category
-    alternatives = []
-    if potential_category:
-        for product in PRODUCT_DB[potential_category]:
-            # Only include products that are in stock
-            if product["stock"] > 0:
-                # If we found an exact match, don't include it in alternatives
-                if product_info.get("found", False) and product_name.lower() in product["name"].lower():
-                    continue
-                alternatives.append({
-                    "name": product["name"],
-                    "price": product["price"],
-                    "stock": product["stock"]
-                })
+        alternatives = PRODUCT_CATALOG.alternatives(product_info["matches"][0]["product"]["id"])
+    else:
+        # Otherwise suggest in-stock products from the category the name points at
+        keywords = product_name.lower().split()
+        categories = PRODUCT_CATALOG.categories()
+        potential_category = next(
+            (category for category in categories if any(keyword in category.lower() for keyword in keywords)),
+            # If no category matches, just pick the first category as a fallback
+            next(iter(categories), None)
+        )
+        alternatives = PRODUCT_CATALOG.category_alternatives(potential_category) if potential_category else []
     
     if alternatives:
         alternatives_text = ", ".join([f"{alt['name']} (₦{alt['price']:,})" for alt in alternatives])
@@ -203,9 +269,7 @@ def recommend_alternatives(product_name: str) -> Dict[str, Any]:
 @tool
 def apply_discount(product_name: str, discount_code: str) -> Dict[str, Any]:
     """Apply a discount code to a product"""
-    from data.mock_data import DISCOUNT_CODES
-    
-    product_info = check_product_availability(product_name)
+    product_info = lookup_product(product_name)
     
     if not product_info["found"]:
         return {
@@ -213,8 +277,8 @@ def apply_discount(product_name: str, discount_code: str) -> Dict[str, Any]:
             "message": product_info["message"]
         }
     
-    if discount_code.upper() in DISCOUNT_CODES:
-        discount_rate = DISCOUNT_CODES[discount_code.upper()]
+    discount_rate = PRODUCT_CATALOG.get_discount_rate(discount_code.upper())
+    if discount_rate is not None:
         original_price = product_info["price"]
         discounted_price = original_price * (1 - discount_rate)
         
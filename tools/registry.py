@@ -0,0 +1,65 @@
+"""
+Dispatch table from LLM intents to tool functions, built once at import
+
+Each entry holds the plain Python function behind the LangChain tool (and
+its coroutine, if there is an async variant), the Pydantic model used to
+validate the LLM's parameters, and the parameter names the function takes.
+Dispatch validates once and calls the function directly with typed kwargs.
+"""
+import inspect
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+from pydantic import BaseModel
+from models.schemas import (
+    CheckProductAvailabilityParams, TrackOrderParams,
+    ApplyDiscountParams, RecommendAlternativesParams,
+    HandleNegotiationParams, ConsultationParams,
+)
+from tools.product_tools import check_product_availability, recommend_alternatives, apply_discount
+from tools.order_tools import track_order
+from tools.negotiation_tools import handle_negotiation, ahandle_negotiation
+from tools.consultation_tools import consultation_service
+
+
+class ToolSpec:
+    """A dispatchable tool: its function, optional coroutine, parameter model and accepted arguments"""
+
+    __slots__ = ("intent", "func", "coroutine", "params_model", "arguments")
+
+    def __init__(self, intent: str, tool: Any, params_model: Type[BaseModel], async_tool: Any = None):
+        self.intent = intent
+        # LangChain tools wrap the function; call it directly
+        self.func: Callable[..., Any] = getattr(tool, "func", None) or tool
+        self.coroutine: Optional[Callable[..., Any]] = getattr(async_tool, "coroutine", None) if async_tool is not None else None
+        self.params_model = params_model
+        # Model fields the function accepts (e.g. handle_negotiation ignores business_type)
+        accepted = inspect.signature(self.func).parameters
+        self.arguments: Tuple[str, ...] = tuple(name for name in params_model.model_fields if name in accepted)
+
+    def validate(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate the LLM's parameters once and return typed kwargs, without None values"""
+        try:
+            values = self.params_model.model_validate(parameters).__dict__
+        except Exception as e:
+            raise ValueError(f"Error validating parameters for {self.intent}: {str(e)}")
+        return {name: values[name] for name in self.arguments if values[name] is not None}
+
+
+TOOL_REGISTRY: Dict[str, ToolSpec] = {
+    spec.intent: spec for spec in (
+        ToolSpec("check_product_availability", check_product_availability, CheckProductAvailabilityParams),
+        ToolSpec("track_order", track_order, TrackOrderParams),
+        ToolSpec("apply_discount", apply_discount, ApplyDiscountParams),
+        ToolSpec("recommend_alternatives", recommend_alternatives, RecommendAlternativesParams),
+        ToolSpec("handle_negotiation", handle_negotiation, HandleNegotiationParams, ahandle_negotiation),
+        ToolSpec("consultation_service", consultation_service, ConsultationParams),
+    )
+}
+
+
+def resolve_tool_call(function_call: Dict[str, Any]) -> Tuple[ToolSpec, Dict[str, Any]]:
+    """Look up the tool for a function call and validate its parameters (LookupError / ValueError)"""
+    intent = function_call.get("intent")
+    spec = TOOL_REGISTRY.get(intent)
+    if spec is None:
+        raise LookupError(f"Unknown intent: {intent}")
+    return spec, spec.validate(function_call.get("parameters") or {})
@@ -1 +1,10 @@
-from .helpers import *
\ No newline at end of file
+from .helpers import *
+from .llm_client import *
+from .stream_parser import *
+from .session_store import *
+from .session_persistence import *
+from .summary_memory import *
+from .prompt_budget import *
+from .response_cache import *
+from .singleflight import *
+from .intent_router import *
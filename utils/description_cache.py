@@ -0,0 +1,222 @@
+"""
+Cache of generated business descriptions
+
+Descriptions only depend on the business type, and there are only about 70
+of them, so every description is generated once, kept for a TTL and saved
+to disk so restarts and other workers reuse it. Workers reload the file
+when it changes, and merge with it under a file lock before saving, so one
+worker's save never drops descriptions another worker generated.
+
+Fill the cache for every business type (from the repository root):
+    python -m utils.description_cache [--concurrency N]
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+import config
+
+try:
+    import fcntl
+except ImportError:  # Windows: no file locks, saves still merge with the file on disk
+    fcntl = None
+
+
+@contextmanager
+def _file_lock(path: str, blocking: bool = True) -> Iterator[bool]:
+    """Hold an exclusive lock on a lock file; yields False if blocking is off and another process holds it"""
+    if fcntl is None:
+        yield True
+        return
+    with open(path, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class BusinessDescriptionCache:
+    """Business descriptions by normalized business type, with a TTL, persisted as JSON"""
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 7 * 24 * 3600, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        # (mtime, size) of the file when it was last read or written
+        self._file_version: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading business description cache: {str(e)}")
+            return {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path:
+            if self._entries is None:
+                self._entries = {}
+            return self._entries
+        # Another worker may have saved descriptions since we last read the file
+        version = self._stat()
+        if self._entries is None or version != self._file_version:
+            if self._entries is not None:
+                self.reloads += 1
+            self._entries = self._read()
+            self._file_version = version
+        return self._entries
+
+    def get(self, business_key: str) -> Optional[Dict[str, Any]]:
+        """The cached description for a business type, if it hasn't expired"""
+        with self._lock:
+            entry = self._load().get(business_key)
+            if entry is None or entry["created"] + self.ttl <= self.clock():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry["description"]
+
+    def __contains__(self, business_key: str) -> bool:
+        with self._lock:
+            entry = self._load().get(business_key)
+            return entry is not None and entry["created"] + self.ttl > self.clock()
+
+    def put(self, business_key: str, description: Dict[str, Any]) -> None:
+        """Cache a generated description (errors are never cached) and save the cache"""
+        if "error" in description:
+            return
+        with self._lock:
+            entry = {"created": self.clock(), "description": description}
+            if not self.path:
+                self._load()[business_key] = entry
+                return
+            with _file_lock(f"{self.path}.lock"):
+                # Merge with what other workers saved, keeping the newest entry per business type
+                entries = self._read()
+                for key, own in self._load().items():
+                    if key not in entries or own["created"] > entries[key]["created"]:
+                        entries[key] = own
+                entries[business_key] = entry
+                self._entries = entries
+                self._save()
+
+    def _save(self) -> None:
+        # Write a new file and swap it in, so readers never see a partial file
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(temporary_path, self.path)
+            self._file_version = self._stat()
+        except OSError as e:
+            print(f"Error saving business description cache: {str(e)}")
+
+    @contextmanager
+    def warmup_lock(self) -> Iterator[bool]:
+        """Yields True in the one process that should warm the cache, False in the others"""
+        if not self.path:
+            yield True
+            return
+        with _file_lock(f"{self.path}.warmup.lock", blocking=False) as acquired:
+            yield acquired
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._load()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "reloads": self.reloads,
+        }
+
+
+DESCRIPTION_CACHE = BusinessDescriptionCache(
+    path=config.DESCRIPTION_CACHE_PATH or None,
+    ttl=config.DESCRIPTION_CACHE_TTL
+)
+
+
+async def warm_business_descriptions(
+    api_key: str,
+    business_types: Iterable[str] = config.BUSINESS_TYPES,
+    concurrency: int = config.DESCRIPTION_WARMUP_CONCURRENCY
+) -> Dict[str, int]:
+    """
+    Generate the description of every business type that isn't cached yet
+
+    Args:
+        api_key: The Groq API key for LLM access
+        business_types: Business types to warm (defaults to config.BUSINESS_TYPES)
+        concurrency: Most LLM calls in flight at once
+
+    Only one process warms the cache at a time; in the others (e.g. the
+    other uvicorn workers starting up) this returns at once, and they pick
+    up the descriptions when the cache file changes.
+
+    Returns:
+        Counts of business types already cached, generated and failed, and
+        whether the warmup was skipped because another process is running it
+    """
+    from utils.helpers import agenerate_business_description, normalize_business_type
+
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"cached": 0, "generated": 0, "failed": 0, "skipped": False}
+
+    async def warm(business_type: str) -> None:
+        if normalize_business_type(business_type) in DESCRIPTION_CACHE:
+            counts["cached"] += 1
+            return
+        async with semaphore:
+            description = await agenerate_business_description(business_type, api_key)
+        counts["failed" if "error" in description else "generated"] += 1
+
+    with DESCRIPTION_CACHE.warmup_lock() as acquired:
+        if not acquired:
+            counts["skipped"] = True
+            return counts
+        await asyncio.gather(*(warm(business_type) for business_type in dict.fromkeys(business_types)))
+    return counts
+
+
+def main(argv: Optional[list] = None) -> None:
+    # Use the importable module (not __main__), which is the cache the helpers write to
+    from utils.description_cache import warm_business_descriptions
+
+    parser = argparse.ArgumentParser(description="Generate and cache the description of every business type")
+    parser.add_argument("--concurrency", type=int, default=config.DESCRIPTION_WARMUP_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    counts = asyncio.run(warm_business_descriptions(config.GROQ_API_KEY, concurrency=args.concurrency))
+    if counts["skipped"]:
+        print("Another process is already warming the business descriptions")
+        return
+    print(f"Business descriptions: {counts['cached']} already cached, {counts['generated']} generated, {counts['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
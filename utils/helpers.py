@@ -1,18 +1,27 @@
+import asyncio
+import contextvars
 import json
 import re
-from typing import Dict, Any, Optional, Tuple
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+import config
+from data.catalog_backend import get_catalog
 from models.schemas import LLMResponse, FunctionCallParameters
+from utils.intent_router import INTENT_ROUTER
+from utils.llm_client import get_llm, complete, acomplete
+from utils.prompt_budget import build_budgeted_prompt
+from utils.response_cache import RESPONSE_CACHE
+from utils.stream_parser import LLMResponseStreamParser
 #from .models import LLMResponse, FunctionCallParameters
 
 
 
 
 
-def generate_zita_prompt(business_type: str) -> str:
-    """Generate Zita's prompt for different business types"""
-    from data.mock_data import PRODUCT_DB
-    
-    sector_prompts = {
+# What Zita helps with for each normalized business type
+SECTOR_PROMPTS = {
     # PRODUCTS - Physical Goods
     "online_clothing_store": "helping customers find clothing items, providing size guides, checking inventory, handling orders and returns, offering styling advice, processing payments, managing delivery tracking",    
     "gadget_shop": "advising on gadget features and specifications, checking product availability, providing pricing information, handling warranty inquiries, assisting with order tracking, offering technical support guidance",    
@@ -102,53 +111,70 @@ def generate_zita_prompt(business_type: str) -> str:
     "surveyor": "explaining surveying services, handling property assessments, providing technical reports, managing site visits, offering consultation services, processing professional fees",   
     "other_unique_niche_services": "explaining specialized services, providing service details, handling custom requirements, managing consultation schedules, offering expert guidance, processing service payments"
 }
-    
-    tasks = sector_prompts.get(business_type.lower(), "assisting customers with general inquiries, sales, and complaints")
-
-    # Define the available tools
-    available_tools = [
-        {
-            "intent": "check_product_availability",
-            "description": "Check if a product is available and get price information",
-            "parameters": ["product_name", "category (optional)"]
-        },
-        {
-            "intent": "track_order",
-            "description": "Track an order status and delivery information",
-            "parameters": ["order_id"]
-        },
-        {
-            "intent": "apply_discount",
-            "description": "Apply a discount code to a product",
-            "parameters": ["product_name", "discount_code"]
-        },
-        {
-            "intent": "recommend_alternatives",
-            "description": "Recommend alternative products when a requested item is out of stock",
-            "parameters": ["product_name"]
-        },
-        {
-            "intent": "handle_negotiation",
-            "description": "Handle price negotiations for products",
-            "parameters": ["product_name", "offered_price", "max_price (optional)", "min_price (optional)"]
-        },
-        {
-            "intent": "consultation_service",
-            "description": "Handle consultaion with external information from the web",
-            "parameters": ["consultation_type", "subject", "business_type (optional)", "description (optional)","location (optional)","budget (optional)","purpose (optional)"]
-        }
-    ]
-    
-    tools_description = "\n".join([
-        f"- {tool['intent']}: {tool['description']} (Parameters: {', '.join(tool['parameters'])})"
-        for tool in available_tools
-    ])
+
+# Define the available tools
+AVAILABLE_TOOLS = [
+    {
+        "intent": "check_product_availability",
+        "description": "Check if a product is available and get price information",
+        "parameters": ["product_name", "category (optional)"]
+    },
+    {
+        "intent": "track_order",
+        "description": "Track an order status and delivery information",
+        "parameters": ["order_id"]
+    },
+    {
+        "intent": "apply_discount",
+        "description": "Apply a discount code to a product",
+        "parameters": ["product_name", "discount_code"]
+    },
+    {
+        "intent": "recommend_alternatives",
+        "description": "Recommend alternative products when a requested item is out of stock",
+        "parameters": ["product_name"]
+    },
+    {
+        "intent": "handle_negotiation",
+        "description": "Handle price negotiations for products",
+        "parameters": ["product_name", "offered_price", "max_price (optional)", "min_price (optional)"]
+    },
+    {
+        "intent": "consultation_service",
+        "description": "Handle consultaion with external information from the web",
+        "parameters": ["consultation_type", "subject", "business_type (optional)", "description (optional)","location (optional)","budget (optional)","purpose (optional)"]
+    }
+]
+
+TOOLS_DESCRIPTION = "\n".join([
+    f"- {tool['intent']}: {tool['description']} (Parameters: {', '.join(tool['parameters'])})"
+    for tool in AVAILABLE_TOOLS
+])
+
+def normalize_business_type(business_type: str) -> str:
+    """Normalize a business type label to its snake_case key"""
+    return re.sub(r'[^a-z0-9]+', '_', business_type.lower()).strip('_')
+
+# Normalization table from UI labels (e.g. "Online Clothing Store") and keys to SECTOR_PROMPTS keys
+BUSINESS_TYPE_KEYS = {label: normalize_business_type(label) for label in config.BUSINESS_TYPES}
+BUSINESS_TYPE_KEYS["General E-commerce Store"] = "general_ecommerce_store"
+
+# Display name used in the prompt for each known key
+BUSINESS_TYPE_LABELS = {key: label for label, key in BUSINESS_TYPE_KEYS.items()}
+
+BUSINESS_TYPE_KEYS.update({key: key for key in SECTOR_PROMPTS})
+
+
+@lru_cache(maxsize=256)
+def _compile_zita_prompt(business_key: str, business_label: str, categories: Tuple[str, ...]) -> str:
+    """Build Zita's prompt; cached per business type and catalog categories"""
+    tasks = SECTOR_PROMPTS.get(business_key, "assisting customers with general inquiries, sales, and complaints")
 
     # Add available product categories to the prompt
-    available_categories = ", ".join(PRODUCT_DB.keys())
+    available_categories = ", ".join(categories)
     
     prompt_text = f"""
-    You are Zita, a conversational customer care and sales assistant for a business in the {business_type} sector.
+    You are Zita, a conversational customer care and sales assistant for a business in the {business_label} sector.
     You're trained to handle chats in either Nigerian Pidgin English or English.
     Default to English unless the customer writes in real Nigerian Pidgin (not just typos or grammar mistakes).
     When in Pidgin, reply in a warm, street-wise but respectful tone. When in English, use friendly and professional language.
@@ -156,7 +182,7 @@ def generate_zita_prompt(business_type: str) -> str:
     Your job is to help customers with tasks such as: {tasks}.
 
     You have the following functions available that you can use:
-    {tools_description}
+    {TOOLS_DESCRIPTION}
 
     For each customer message, determine if you need to call a function from the customer's intent. If yes, respond in the following JSON format:
     {{
@@ -170,6 +196,16 @@ def generate_zita_prompt(business_type: str) -> str:
         }}
     }}
 
+    If the message needs several independent functions at once (e.g. a product check and an order status), use a
+    "function_calls" list instead of "function_call":
+    {{
+        "response_to_user": "your friendly response to the user",
+        "function_calls": [
+            {{"intent": "first intent", "parameters": {{"parameter1": "value1"}}}},
+            {{"intent": "second intent", "parameters": {{"parameter1": "value1"}}}}
+        ]
+    }}
+
     If no function call is needed, respond in this format:
     {{
         "response_to_user": "your friendly response to the user",
@@ -188,6 +224,18 @@ def generate_zita_prompt(business_type: str) -> str:
 
     return prompt_text.strip()
 
+
+def generate_zita_prompt(business_type: str) -> str:
+    """Generate Zita's prompt for different business types"""
+    business_key = BUSINESS_TYPE_KEYS.get(business_type)
+    if business_key is None:
+        business_key = normalize_business_type(business_type)
+    business_label = BUSINESS_TYPE_LABELS.get(business_key, business_type)
+    
+    # The category tuple is part of the cache key, so catalog changes invalidate cached prompts
+    return _compile_zita_prompt(business_key, business_label, tuple(get_catalog().categories()))
+
+
 #===============version 3====================
 def parse_llm_response(response_text: str) -> Dict[str, Any]:
     """Parse the LLM response to extract function call and user response"""
@@ -198,7 +246,16 @@ def parse_llm_response(response_text: str) -> Dict[str, Any]:
         # Validate with Pydantic model
         return LLMResponse(**response_data).model_dump()
     except json.JSONDecodeError:
-        # If that fails, try to extract JSON from the text
+        # If that fails, extract the envelope incrementally, skipping prose and stray braces around it
+        parser = LLMResponseStreamParser()
+        parser.feed(response_text)
+        if parser.complete and parser.response_complete:
+            return LLMResponse(
+                response_to_user=parser.response_text,
+                function_calls=parser.function_calls
+            ).model_dump()
+        
+        # Otherwise try to extract JSON from the text
         try:
             # Look for JSON-like structure between braces
             json_match = re.search(r'\{[\s\S]*\}', response_text)
@@ -222,6 +279,15 @@ def parse_llm_response(response_text: str) -> Dict[str, Any]:
                             if 'parameters' not in func_call or not isinstance(func_call['parameters'], dict):
                                 func_call['parameters'] = {}
                 
+                # Keep only the valid entries of function_calls
+                if 'function_calls' in response_data:
+                    func_calls = response_data['function_calls']
+                    response_data['function_calls'] = [
+                        {"intent": func_call['intent'], "parameters": func_call.get('parameters') if isinstance(func_call.get('parameters'), dict) else {}}
+                        for func_call in (func_calls if isinstance(func_calls, list) else [])
+                        if isinstance(func_call, dict) and 'intent' in func_call
+                    ]
+                
                 # Validate with Pydantic model
                 return LLMResponse(**response_data).model_dump()
             
@@ -312,121 +378,397 @@ def parse_llm_response(response_text: str) -> Dict[str, Any]:
 #     ).model_dump()
 
 
+# Bounded pool for tools that only have a blocking implementation, so the
+# async pipeline never runs them on the event loop
+TOOL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=config.TOOL_EXECUTOR_MAX_WORKERS,
+    thread_name_prefix="zita-tool"
+)
+
+
+@lru_cache(maxsize=None)
+def _tool_resolver():
+    """The tool registry's resolver (imported on first use, because the tool modules import utils)"""
+    from tools.registry import resolve_tool_call
+    return resolve_tool_call
+
+
+def _resolve_function_call(function_call: Dict[str, Any]):
+    """Look up the tool for a function call and validate its parameters; returns (spec, kwargs)"""
+    return _tool_resolver()(function_call)
+
+
 def process_function_call(function_call: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """Process a function call based on intent and parameters"""
     if not function_call:
         return None
     
-    from tools.product_tools import check_product_availability, recommend_alternatives, apply_discount
-    from tools.order_tools import track_order
-    from tools.negotiation_tools import handle_negotiation
-    from tools.consultation_tools import consultation_service
-    from models.schemas import (
-        CheckProductAvailabilityParams, TrackOrderParams, 
-        ApplyDiscountParams, RecommendAlternativesParams,
-        HandleNegotiationParams,ConsultationParams,
-    )
-    
-    intent = function_call.get("intent")
-    parameters = function_call.get("parameters", {})
-    
-    # Map of available tools and their parameter models
-    available_tools = {
-        "check_product_availability": (check_product_availability, CheckProductAvailabilityParams),
-        "track_order": (track_order, TrackOrderParams),
-        "apply_discount": (apply_discount, ApplyDiscountParams),
-        "recommend_alternatives": (recommend_alternatives, RecommendAlternativesParams),
-        "handle_negotiation": (handle_negotiation, HandleNegotiationParams),
-        "consultation_service": (consultation_service, ConsultationParams)
+    try:
+        spec, kwargs = _resolve_function_call(function_call)
+    except (LookupError, ValueError) as e:
+        return {"error": str(e)}
+    
+    # Call the tool function directly with the validated, typed parameters
+    try:
+        return spec.func(**kwargs)
+    except Exception as e:
+        return {"error": f"Error executing {spec.intent}: {str(e)}"}
+
+
+async def aprocess_function_call(function_call: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Async version of process_function_call that never blocks the event loop"""
+    if not function_call:
+        return None
+    
+    try:
+        spec, kwargs = _resolve_function_call(function_call)
+    except (LookupError, ValueError) as e:
+        return {"error": str(e)}
+    
+    try:
+        # Prefer the native async tool, otherwise run the blocking one on the bounded executor
+        if spec.coroutine is not None:
+            return await spec.coroutine(**kwargs)
+        
+        # Run it in a copy of this context, so the tool sees request-scoped state (e.g. product lookups)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(TOOL_EXECUTOR, partial(contextvars.copy_context().run, spec.func, **kwargs))
+    except Exception as e:
+        return {"error": f"Error executing {spec.intent}: {str(e)}"}
+
+
+def _function_call_record(function_call: Dict[str, Any], result: Optional[Dict[str, Any]], started: float) -> Dict[str, Any]:
+    """One call's entry in a multi-call function result"""
+    return {
+        "intent": function_call.get("intent"),
+        "parameters": function_call.get("parameters", {}),
+        "result": result,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
+
+
+def _timed_function_call(function_call: Dict[str, Any]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    return _function_call_record(function_call, process_function_call(function_call), started)
+
+
+async def _atimed_function_call(function_call: Dict[str, Any]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    return _function_call_record(function_call, await aprocess_function_call(function_call), started)
+
+
+def _merge_function_results(records: List[Dict[str, Any]], started: float) -> Dict[str, Any]:
+    """Combine the results of several function calls into one function result"""
+    merged = {
+        "success": all(record["result"] is not None and "error" not in record["result"] for record in records),
+        "results": records,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)
     }
+    messages = [record["result"]["message"] for record in records if record["result"] and "message" in record["result"]]
+    if messages:
+        merged["message"] = "\n\n".join(messages)
+    return merged
+
+
+def process_function_calls(function_calls: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Execute the function calls of one LLM response, concurrently when there are several
+    
+    Args:
+        function_calls: The calls from parse_llm_response (at most config.MAX_FUNCTION_CALLS_PER_TURN run)
+    
+    Returns:
+        The tool result for a single call. For several calls, one merged result with
+        every call's message, and per-call results and timings:
+        {"success", "message", "results": [{"intent", "parameters", "result", "elapsed_ms"}], "elapsed_ms"}
+    """
+    if not function_calls:
+        return None
+    function_calls = function_calls[:config.MAX_FUNCTION_CALLS_PER_TURN]
+    if len(function_calls) == 1:
+        return process_function_call(function_calls[0])
     
-    if intent not in available_tools:
-        return {"error": f"Unknown intent: {intent}"}
+    # Each call runs in a copy of this context, so they all see request-scoped state
+    started = time.perf_counter()
+    futures = [
+        TOOL_EXECUTOR.submit(contextvars.copy_context().run, _timed_function_call, function_call)
+        for function_call in function_calls
+    ]
+    return _merge_function_results([future.result() for future in futures], started)
+
+
+async def aprocess_function_calls(function_calls: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Async version of process_function_calls (async tools run on the loop, blocking tools on the executor)"""
+    if not function_calls:
+        return None
+    function_calls = function_calls[:config.MAX_FUNCTION_CALLS_PER_TURN]
+    if len(function_calls) == 1:
+        return await aprocess_function_call(function_calls[0])
     
-    tool_func, param_model = available_tools[intent]
+    started = time.perf_counter()
+    records = await asyncio.gather(*(_atimed_function_call(function_call) for function_call in function_calls))
+    return _merge_function_results(list(records), started)
+
+
+def _build_prompt_text(user_input: str, business_type: str, memory=None) -> str:
+    """Build the full prompt from Zita's system prompt, conversation history and user input"""
+    # Generate the prompt based on business type
+    zita_prompt = generate_zita_prompt(business_type)
+    
+    # Build conversation history if memory is provided
+    conversation_history = ""
+    if memory and hasattr(memory, "buffer") and memory.buffer:
+        conversation_history = memory.buffer
+    
+    # Create prompt with conversation history and user input, trimming history to the token ceiling
+    prompt_text, _ = build_budgeted_prompt(zita_prompt, conversation_history, user_input)
+    return prompt_text
+
+
+def _response_cache_key(user_input: str, business_type: str, memory=None):
+    """Response cache key for a customer message in the current conversation state"""
+    return RESPONSE_CACHE.key(normalize_business_type(business_type), user_input, memory)
+
+
+async def _single_chunk(content: str) -> AsyncIterator[str]:
+    """A cached completion, delivered like a one-chunk stream"""
+    yield content
+
+
+def _remember_turn(user_input: str, response_content: str, memory=None) -> Tuple[str, List[Dict[str, Any]]]:
+    """Parse the raw LLM output and save the turn to memory; returns (response_to_user, function_calls)"""
+    # Parse the response
+    parsed_response = parse_llm_response(response_content)
+    
+    # Get the response to show to the user
+    response_to_user = parsed_response.get("response_to_user")
+    
+    # Update memory if provided
+    if memory:
+        memory.save_context({"input": f"Customer: {user_input}"}, {"output": f"Zita: {response_to_user}"})
+    
+    return response_to_user, parsed_response.get("function_calls") or []
+
+
+def _append_function_result(response_to_user: str, function_result: Optional[Dict[str, Any]], memory=None) -> str:
+    """Append a tool result message to the user response and to memory"""
+    # If we have a function result with a message, append it to the response
+    if function_result and "message" in function_result:
+        response_to_user += f"\n\n{function_result['message']}"
+        # Update memory with function result if provided
+        if memory:
+            memory.save_context({"input": ""}, {"output": f"Zita: {function_result['message']}"})
+    return response_to_user
+
+
+def get_response(user_input: str, api_key: str, business_type: str, memory=None) -> Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[str], Optional[str]]:
+    """
+    Generate LLM response and process any function calls
+    
+    Function calls are executed here, once; callers should use the
+    returned function_result instead of dispatching the call again.
+    
+    Returns:
+        (response_to_user, function_call, function_result, detected_intent, error)
+        When the LLM asked for several calls, function_call and detected_intent are
+        the first one, and function_result is the merged result of all of them
+        (see process_function_calls).
+    """
+    if not api_key:
+        return "⚠️ Please enter a valid API key.", None, None, None, None
     
     try:
-        # Validate parameters with the appropriate Pydantic model
-        validated_params = param_model(**parameters).model_dump()
-        # Remove None values
-        validated_params = {k: v for k, v in validated_params.items() if v is not None}
+        # Obvious requests ("track ORD123") skip the LLM, and repeated questions in
+        # the same conversation state are answered from the cache
+        cache_key = _response_cache_key(user_input, business_type, memory)
+        response_content = INTENT_ROUTER.route(user_input)
+        if response_content is None:
+            response_content = RESPONSE_CACHE.get(cache_key)
+        cache_miss = response_content is None
         
-        # Execute the tool function with validated parameters
-        try:
-            if hasattr(tool_func, 'run'):
-                param_str = " ".join([f"{k}={repr(v)}" for k, v in validated_params.items()])
-                result = tool_func.run(param_str)
-            else:
-                result = tool_func(**validated_params)
-            return result
-        except Exception as e:
-            return {"error": f"Error executing {intent}: {str(e)}"}
+        if cache_miss:
+            prompt_text = _build_prompt_text(user_input, business_type, memory)
             
+            # Get LLM response (identical prompts in flight share one call)
+            response_content = complete(api_key, prompt_text)
+        
+        response_to_user, function_calls = _remember_turn(user_input, response_content, memory)
+        if cache_miss:
+            RESPONSE_CACHE.store(cache_key, response_content, function_calls)
+        
+        # Process function calls if present (several run concurrently)
+        function_call = function_calls[0] if function_calls else None
+        detected_intent = None
+        function_result = None
+        
+        if function_call:
+            detected_intent = function_call.get("intent")
+            function_result = process_function_calls(function_calls)
+            response_to_user = _append_function_result(response_to_user, function_result, memory)
+        
+        return response_to_user, function_call, function_result, detected_intent, None
+    
     except Exception as e:
-        return {"error": f"Error validating parameters for {intent}: {str(e)}"}
+        return f"⚠️ Error: {str(e)}", None, None, None, str(e)
 
 
-def get_response(user_input: str, api_key: str, business_type: str, memory=None) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
-    """Generate LLM response and process any function calls"""
+async def aget_response(user_input: str, api_key: str, business_type: str, memory=None) -> Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[str], Optional[str]]:
+    """Async version of get_response that awaits the LLM and tool calls instead of blocking"""
     if not api_key:
-        return "⚠️ Please enter a valid API key.", None, None
+        return "⚠️ Please enter a valid API key.", None, None, None, None
     
     try:
-        # Generate the prompt based on business type
-        zita_prompt = generate_zita_prompt(business_type)
-        
-        # Initialize LLM client
-        from langchain_groq import ChatGroq
-        llm = ChatGroq(
-            groq_api_key=api_key,
-            model_name="llama3-70b-8192"
-        )
-        
-        # Build conversation history if memory is provided
-        conversation_history = ""
-        if memory and hasattr(memory, "buffer") and memory.buffer:
-            conversation_history = memory.buffer
-        
-        # Create prompt with conversation history and user input
-        if conversation_history:
-            prompt_text = f"{zita_prompt}\n\n{conversation_history}\nCustomer: {user_input}\nZita:"
-        else:
-            prompt_text = f"{zita_prompt}\n\nCustomer: {user_input}\nZita:"
+        # Obvious requests ("track ORD123") skip the LLM, and repeated questions in
+        # the same conversation state are answered from the cache
+        cache_key = _response_cache_key(user_input, business_type, memory)
+        response_content = INTENT_ROUTER.route(user_input)
+        if response_content is None:
+            response_content = RESPONSE_CACHE.get(cache_key)
+        cache_miss = response_content is None
         
-        # Get LLM response
-        raw_response = llm.invoke(prompt_text)
+        if cache_miss:
+            prompt_text = _build_prompt_text(user_input, business_type, memory)
+            
+            # Get LLM response without blocking the event loop (identical prompts in flight share one call)
+            response_content = await acomplete(api_key, prompt_text)
         
-        # Parse the response
-        parsed_response = parse_llm_response(raw_response.content)
+        response_to_user, function_calls = _remember_turn(user_input, response_content, memory)
+        if cache_miss:
+            RESPONSE_CACHE.store(cache_key, response_content, function_calls)
         
-        # Get the response to show to the user
-        response_to_user = parsed_response.get("response_to_user")
+        # Process function calls if present (several run concurrently)
+        function_call = function_calls[0] if function_calls else None
+        detected_intent = None
+        function_result = None
         
-        # Update memory if provided
-        if memory:
-            memory.save_context({"input": f"Customer: {user_input}"}, {"output": f"Zita: {response_to_user}"})
+        if function_call:
+            detected_intent = function_call.get("intent")
+            function_result = await aprocess_function_calls(function_calls)
+            response_to_user = _append_function_result(response_to_user, function_result, memory)
+        
+        return response_to_user, function_call, function_result, detected_intent, None
+    
+    except Exception as e:
+        return f"⚠️ Error: {str(e)}", None, None, None, str(e)
+
+
+async def _astream_negotiation_persona(function_result: Dict[str, Any], api_key: str) -> AsyncIterator[Dict[str, Any]]:
+    """Stream the LLM-worded negotiation reply, replacing the template message once it's complete"""
+    from tools.negotiation_tools import astream_negotiation_persona
+    
+    persona_chunks = []
+    try:
+        async for text in astream_negotiation_persona(function_result, api_key):
+            persona_chunks.append(text)
+            yield {"event": "persona", "data": {"text": text}}
+    except Exception as e:
+        # Keep the template message
+        print(f"Error generating negotiation reply: {str(e)}")
+        return
+    if persona_chunks:
+        function_result["message"] = "".join(persona_chunks).strip()
+
+
+async def astream_response(user_input: str, api_key: str, business_type: str, memory=None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream the LLM response as events
+    
+    Yields dictionaries with an "event" name and its "data":
+        token: a new piece of response_to_user text ({"text": ...})
+        function_call: a function call requested by the LLM (one event per call)
+        function_result: the result of executing the function calls (merged when there are several)
+        persona: a piece of the LLM-worded negotiation reply ({"text": ...}), when NEGOTIATION_PERSONA_MODE is "llm"
+        response: the complete turn (response, function_call, function_result, detected_intent)
+        error: something went wrong ({"error": ...})
+    """
+    if not api_key:
+        yield {"event": "error", "data": {"error": "⚠️ Please enter a valid API key."}}
+        return
+    
+    try:
+        # Obvious requests ("track ORD123") skip the LLM, and repeated questions in
+        # the same conversation state are answered from the cache
+        cache_key = _response_cache_key(user_input, business_type, memory)
+        cached_content = INTENT_ROUTER.route(user_input)
+        if cached_content is None:
+            cached_content = RESPONSE_CACHE.get(cache_key)
+        
+        if cached_content is None:
+            prompt_text = _build_prompt_text(user_input, business_type, memory)
+            
+            # Get the shared LLM client
+            llm = get_llm(api_key)
+            completion = (chunk.content async for chunk in llm.astream(prompt_text))
+        else:
+            completion = _single_chunk(cached_content)
+        
+        # Stream the user-facing text as the completion arrives, and start each
+        # function call as soon as its object closes
+        parser = LLMResponseStreamParser()
+        response_chunks = []
+        function_tasks = []
+        calls_started = None
+        async for content in completion:
+            response_chunks.append(content)
+            for event, data in parser.feed(content):
+                if event == "text":
+                    yield {"event": "token", "data": {"text": data}}
+                elif event == "function_call" and len(function_tasks) < config.MAX_FUNCTION_CALLS_PER_TURN:
+                    yield {"event": "function_call", "data": data}
+                    calls_started = calls_started or time.perf_counter()
+                    function_tasks.append(asyncio.create_task(_atimed_function_call(data)))
+        
+        response_content = "".join(response_chunks)
+        response_to_user, function_calls = _remember_turn(user_input, response_content, memory)
+        if cached_content is None:
+            RESPONSE_CACHE.store(cache_key, response_content, function_calls)
+        function_calls = function_calls[:config.MAX_FUNCTION_CALLS_PER_TURN]
+        function_call = function_calls[0] if function_calls else None
+        
+        # Send whatever the incremental parser couldn't stream (e.g. a plain-text answer)
+        if response_to_user.startswith(parser.response_text) and len(response_to_user) > len(parser.response_text):
+            yield {"event": "token", "data": {"text": response_to_user[len(parser.response_text):]}}
         
         # Process function call if present
-        function_call = parsed_response.get("function_call")
         detected_intent = None
         function_result = None
         
         if function_call:
             detected_intent = function_call.get("intent")
-            function_result = process_function_call(function_call)
+            if function_calls != parser.function_calls[:config.MAX_FUNCTION_CALLS_PER_TURN]:
+                # The full parse disagrees with the incremental one; run what it found instead
+                for task in function_tasks:
+                    task.cancel()
+                for call in function_calls:
+                    yield {"event": "function_call", "data": call}
+                calls_started = time.perf_counter()
+                function_tasks = [asyncio.create_task(_atimed_function_call(call)) for call in function_calls]
+            records = await asyncio.gather(*function_tasks)
+            function_result = records[0]["result"] if len(records) == 1 else _merge_function_results(list(records), calls_started)
+            yield {"event": "function_result", "data": function_result}
             
-            # If we have a function result with a message, append it to the response
-            if function_result and "message" in function_result:
-                response_to_user += f"\n\n{function_result['message']}"
-                # Update memory with function result if provided
-                if memory:
-                    memory.save_context({"input": ""}, {"output": f"Zita: {function_result['message']}"})
+            # The negotiation price is already decided; optionally stream an LLM-worded reply after it
+            if detected_intent == "handle_negotiation" and config.NEGOTIATION_PERSONA_MODE == "llm" and function_result and "decision" in function_result:
+                async for event in _astream_negotiation_persona(function_result, api_key):
+                    yield event
+            
+            response_to_user = _append_function_result(response_to_user, function_result, memory)
+        else:
+            for task in function_tasks:
+                task.cancel()
         
-        return response_to_user, function_call, detected_intent, None
+        yield {
+            "event": "response",
+            "data": {
+                "response": response_to_user,
+                "function_call": function_call,
+                "function_result": function_result,
+                "detected_intent": detected_intent
+            }
+        }
     
     except Exception as e:
-        return f"⚠️ Error: {str(e)}", None,None, str(e)
-
+        yield {"event": "error", "data": {"error": f"⚠️ Error: {str(e)}"}}
 
 
 # import config
@@ -553,6 +895,45 @@ def get_response(user_input: str, api_key: str, business_type: str, memory=None)
 #         return f"⚠️ Error: {str(e)}", None, None
 
 
+def _business_description_prompt(business_type: str) -> str:
+    """Create a detailed prompt for business description generation"""
+    return f"""
+        Generate a comprehensive business description for a business in the {business_type} sector.
+        
+        Please structure your response as a JSON object with the following fields:
+        1. "description": A detailed paragraph describing the business type, its main activities, and value proposition
+        2. "key_operations": An array of strings listing the main operational activities of this business type
+        
+        Ensure your response is factual, comprehensive, and directly relevant to the {business_type} sector.
+        Ensure your response is as you are part of the organization.
+        The response must be a valid JSON object that can be parsed by Python's json.loads() function.
+        """
+
+
+def _parse_business_description(content: str) -> Dict[str, Any]:
+    """Parse the LLM business description output as JSON"""
+    try:
+        # Try to parse the entire response as JSON
+        response_data = json.loads(content)
+        return response_data
+    except json.JSONDecodeError:
+        # If that fails, try to extract JSON from the text
+        try:
+            # Look for JSON-like structure between braces
+            json_match = re.search(r'\{[\s\S]*\}', content)
+            if json_match:
+                response_data = json.loads(json_match.group(0))
+                return response_data
+        except (json.JSONDecodeError, AttributeError):
+            pass
+    
+    # If JSON parsing fails, return a structured error response
+    return {
+        "error": "Failed to parse LLM response as JSON",
+        "raw_response": content
+    }
+
+
 def generate_business_description(business_type: str, api_key: str) -> Dict[str, Any]:
     """
     Generate a comprehensive business description using LLM based on the business sector
@@ -564,54 +945,49 @@ def generate_business_description(business_type: str, api_key: str) -> Dict[str,
     Returns:
         A dictionary containing the business description and related information
     """
+    from utils.description_cache import DESCRIPTION_CACHE
+    
+    # Descriptions only depend on the business type, so each one is generated once
+    business_key = normalize_business_type(business_type)
+    cached = DESCRIPTION_CACHE.get(business_key)
+    if cached is not None:
+        return cached
+    
     if not api_key:
         return {"error": "⚠️ Please enter a valid API key."}
     
     try:
-        # Initialize LLM client
-        from langchain_groq import ChatGroq
-        llm = ChatGroq(
-            groq_api_key=api_key,
-            model_name="llama3-70b-8192"
-        )
-        
-        # Create a detailed prompt for business description generation
-        prompt_text = f"""
-        Generate a comprehensive business description for a business in the {business_type} sector.
-        
-        Please structure your response as a JSON object with the following fields:
-        1. "description": A detailed paragraph describing the business type, its main activities, and value proposition
-        2. "key_operations": An array of strings listing the main operational activities of this business type
-        
-        Ensure your response is factual, comprehensive, and directly relevant to the {business_type} sector.
-        Ensure your response is as you are part of the organization.
-        The response must be a valid JSON object that can be parsed by Python's json.loads() function.
-        """
+        # Get LLM response (concurrent requests for the same business type share one call)
+        content = complete(api_key, _business_description_prompt(business_type))
         
-        # Get LLM response
-        raw_response = llm.invoke(prompt_text)
+        description = _parse_business_description(content)
+        DESCRIPTION_CACHE.put(business_key, description)
+        return description
+    
+    except Exception as e:
+        return {"error": f"⚠️ Error: {str(e)}"}
+
+
+async def agenerate_business_description(business_type: str, api_key: str) -> Dict[str, Any]:
+    """Async version of generate_business_description"""
+    from utils.description_cache import DESCRIPTION_CACHE
+    
+    # Descriptions only depend on the business type, so each one is generated once
+    business_key = normalize_business_type(business_type)
+    cached = DESCRIPTION_CACHE.get(business_key)
+    if cached is not None:
+        return cached
+    
+    if not api_key:
+        return {"error": "⚠️ Please enter a valid API key."}
+    
+    try:
+        # Get LLM response without blocking the event loop (concurrent requests for the same business type share one call)
+        content = await acomplete(api_key, _business_description_prompt(business_type))
         
-        # Parse the JSON response
-        try:
-            # Try to parse the entire response as JSON
-            response_data = json.loads(raw_response.content)
-            return response_data
-        except json.JSONDecodeError:
-            # If that fails, try to extract JSON from the text
-            try:
-                # Look for JSON-like structure between braces
-                json_match = re.search(r'\{[\s\S]*\}', raw_response.content)
-                if json_match:
-                    response_data = json.loads(json_match.group(0))
-                    return response_data
-            except (json.JSONDecodeError, AttributeError):
-                pass
-        
-        # If JSON parsing fails, return a structured error response
-        return {
-            "error": "Failed to parse LLM response as JSON",
-            "raw_response": raw_response.content
-        }
+        description = _parse_business_description(content)
+        DESCRIPTION_CACHE.put(business_key, description)
+        return description
     
     except Exception as e:
         return {"error": f"⚠️ Error: {str(e)}"}
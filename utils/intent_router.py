@@ -0,0 +1,183 @@
+import json
+import re
+import threading
+from typing import Any, Dict, Optional
+import config
+from data.catalog_backend import CatalogBackend, get_catalog
+from data.catalog_index import tokenize
+
+
+# Order IDs like ORD123, ord-123 or ORD #123
+_ORDER_ID_PATTERN = re.compile(r"\b([A-Za-z]{2,5})\s?[-#]?\s?(\d{2,12})\b")
+# Candidate discount codes (confirmed against the catalog's discount codes)
+_CODE_PATTERN = re.compile(r"\b[A-Za-z0-9]{4,20}\b")
+
+# Explicitly asking where an order is; a bare mention of an order ID or "order" isn't enough
+_TRACK_KEYWORDS = re.compile(r"\b(track|tracking|where|when|status|check|eta)\b|\?", re.IGNORECASE)
+# Explicitly asking to apply a code (not "is it valid?")
+_APPLY_KEYWORDS = re.compile(r"\b(apply|use|using|redeem|add)\b", re.IGNORECASE)
+# Asks the fast path doesn't handle; any of these leaves the message to the LLM
+_OTHER_INTENT_KEYWORDS = re.compile(
+    r"\b(cancel|refund|return|complain|negotiate|cheaper|last price|reduce|alternative|instead|recommend|and also|also)\b|\?.*\?",
+    re.IGNORECASE
+)
+# Complaints, negations and instructions about an order or code are never routine
+_COMPLAINT_KEYWORDS = re.compile(
+    r"\b(damaged|broken|wrong|missing|late|delayed|lost|stolen|fake|problem|issue|exchange|replace|complaint"
+    r"|hold|stop|wait|yet|valid|invalid|expired|not|no|never|\w+n['’]t"
+    # Contractions typed without the apostrophe
+    r"|dont|didnt|doesnt|cant|wont|isnt|hasnt|havent|wasnt|arent)\b",
+    re.IGNORECASE
+)
+# Words removed before looking up the product name in a discount request
+_DISCOUNT_FILLER = {
+    "apply", "use", "using", "code", "coupon", "discount", "promo", "voucher", "to", "on", "for", "the", "my",
+    "a", "an", "please", "pls", "abeg", "i", "want", "can", "you", "with", "this", "that", "it"
+}
+
+
+class IntentRouter:
+    """
+    Answer obvious requests without the LLM
+
+    Messages like "track ORD123" or "apply SUMMER25 to facial cleanser"
+    already contain everything track_order or apply_discount needs. Order
+    IDs and discount codes are found with compiled patterns and confirmed
+    against the catalog backend; product names are resolved with the
+    catalog's search index. Only an explicit request (a tracking word or a
+    question, an "apply"/"use" verb) gets a confident match; messages that
+    mention anything else (complaints, negations, other asks), or whose
+    confidence is below min_confidence, go to the LLM as usual.
+    """
+
+    def __init__(self, catalog: Optional[CatalogBackend] = None, min_confidence: float = 0.85, max_words: int = 16):
+        self._catalog = catalog
+        self.min_confidence = min_confidence
+        self.max_words = max_words
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.routed: Dict[str, int] = {}
+        self.below_threshold = 0
+
+    @property
+    def catalog(self) -> CatalogBackend:
+        if self._catalog is None:
+            self._catalog = get_catalog()
+        return self._catalog
+
+    def classify(self, message: str) -> Optional[Dict[str, Any]]:
+        """The best intent for a message with its parameters and confidence, or None"""
+        if (
+            len(message.split()) > self.max_words
+            or _OTHER_INTENT_KEYWORDS.search(message)
+            or _COMPLAINT_KEYWORDS.search(message)
+        ):
+            return None
+        candidates = [self._classify_order(message), self._classify_discount(message)]
+        candidates = [candidate for candidate in candidates if candidate is not None]
+        # A message that looks like two intents is left to the LLM
+        if len(candidates) != 1:
+            return None
+        return candidates[0]
+
+    def _classify_order(self, message: str) -> Optional[Dict[str, Any]]:
+        order_ids = list(dict.fromkeys(
+            f"{prefix}{digits}".upper() for prefix, digits in _ORDER_ID_PATTERN.findall(message)
+        ))
+        known = [order_id for order_id in order_ids if self.catalog.get_order(order_id) is not None]
+        if len(known) != 1:
+            return None
+
+        if _TRACK_KEYWORDS.search(message):
+            confidence = 0.95
+        elif len(message.split()) <= 2:
+            # A bare order ID ("ORD123") is still clear enough
+            confidence = 0.9
+        else:
+            # The ID with other words but no tracking ask could be about anything
+            confidence = 0.6
+        return {
+            "intent": "track_order",
+            "parameters": {"order_id": known[0]},
+            "confidence": confidence,
+            "response_to_user": f"Let me check order {known[0]} for you."
+        }
+
+    def _classify_discount(self, message: str) -> Optional[Dict[str, Any]]:
+        codes = list(dict.fromkeys(
+            word.upper() for word in _CODE_PATTERN.findall(message)
+            if word.lower() not in _DISCOUNT_FILLER and self.catalog.get_discount_rate(word.upper()) is not None
+        ))
+        if len(codes) != 1:
+            return None
+
+        # Whatever is left after the code and filler words should name one product
+        code_tokens = set(tokenize(codes[0]))
+        remainder = " ".join(
+            token for token in tokenize(message) if token not in _DISCOUNT_FILLER and token not in code_tokens
+        )
+        if not remainder:
+            return None
+        matches = self.catalog.search(remainder, None, 2)
+        if not matches:
+            return None
+        _, product, relevance = matches[0]
+        # Two equally good products means the name is ambiguous
+        if len(matches) > 1 and matches[1][2] >= relevance:
+            return None
+
+        confidence = 0.65 + 0.3 * relevance
+        if not _APPLY_KEYWORDS.search(message):
+            # A code and a product without "apply"/"use" could be a question about the code
+            confidence = min(confidence, 0.6)
+        return {
+            "intent": "apply_discount",
+            "parameters": {"product_name": product["name"], "discount_code": codes[0]},
+            "confidence": round(confidence, 3),
+            "response_to_user": f"Let me apply {codes[0]} to the {product['name']} for you."
+        }
+
+    def route(self, message: str) -> Optional[str]:
+        """
+        A ready-made LLM completion for an obvious request, or None to ask the LLM
+
+        Returns:
+            The JSON envelope the LLM would have produced (response_to_user and function_call)
+        """
+        if not config.INTENT_ROUTER_ENABLED:
+            return None
+
+        try:
+            classified = self.classify(message)
+        except Exception as e:
+            print(f"Error classifying intent: {str(e)}")
+            classified = None
+
+        with self._lock:
+            self.turns += 1
+            if classified is None:
+                return None
+            if classified["confidence"] < self.min_confidence:
+                self.below_threshold += 1
+                return None
+            self.routed[classified["intent"]] = self.routed.get(classified["intent"], 0) + 1
+
+        return json.dumps({
+            "response_to_user": classified["response_to_user"],
+            "function_call": {"intent": classified["intent"], "parameters": classified["parameters"]}
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        skipped = sum(self.routed.values())
+        return {
+            "enabled": config.INTENT_ROUTER_ENABLED,
+            "min_confidence": self.min_confidence,
+            "turns": self.turns,
+            "llm_skipped": skipped,
+            "llm_skipped_ratio": round(skipped / self.turns, 3) if self.turns else 0.0,
+            "by_intent": dict(self.routed),
+            "below_threshold": self.below_threshold,
+        }
+
+
+INTENT_ROUTER = IntentRouter(min_confidence=config.INTENT_ROUTER_MIN_CONFIDENCE)
@@ -0,0 +1,131 @@
+import hashlib
+import threading
+from typing import Any, Dict, Tuple
+import httpx
+import config
+from utils.singleflight import AsyncSingleFlight, SingleFlight
+
+
+# Process-wide registry of LLM clients keyed by (api_key, model_name, params)
+_llm_clients: Dict[Tuple[str, str, Tuple[Tuple[str, Any], ...]], Any] = {}
+_llm_clients_lock = threading.Lock()
+
+# Identical prompts in flight at the same time share one upstream call
+LLM_SINGLEFLIGHT = SingleFlight(
+    window=config.LLM_COALESCE_WINDOW,
+    max_waiters=config.LLM_COALESCE_MAX_WAITERS
+)
+LLM_ASYNC_SINGLEFLIGHT = AsyncSingleFlight(
+    window=config.LLM_COALESCE_WINDOW,
+    max_waiters=config.LLM_COALESCE_MAX_WAITERS
+)
+
+
+def _pool_limits() -> httpx.Limits:
+    """Connection pool limits shared by the sync and async HTTP clients"""
+    return httpx.Limits(
+        max_connections=config.LLM_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=config.LLM_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=config.LLM_POOL_KEEPALIVE_EXPIRY
+    )
+
+
+def get_llm(api_key: str, model_name: str = config.MODEL_NAME, **params) -> Any:
+    """
+    Get a shared ChatGroq client for the given API key, model and parameters
+
+    Clients are created once per process and keep their HTTP connection pools
+    warm, so keep-alive connections and TLS sessions are reused across turns.
+
+    Args:
+        api_key: The Groq API key for LLM access
+        model_name: The Groq model to use
+        **params: Extra ChatGroq parameters (e.g. temperature)
+
+    Returns:
+        A ChatGroq instance
+    """
+    key = (api_key, model_name, tuple(sorted(params.items())))
+
+    llm = _llm_clients.get(key)
+    if llm is not None:
+        return llm
+
+    with _llm_clients_lock:
+        # Another thread may have created the client while we waited for the lock
+        llm = _llm_clients.get(key)
+        if llm is None:
+            from langchain_groq import ChatGroq
+            llm = ChatGroq(
+                groq_api_key=api_key,
+                model_name=model_name,
+                http_client=httpx.Client(limits=_pool_limits()),
+                http_async_client=httpx.AsyncClient(limits=_pool_limits()),
+                **params
+            )
+            _llm_clients[key] = llm
+
+    return llm
+
+
+async def aclose_llm_clients() -> None:
+    """Close every pooled client, e.g. on application shutdown"""
+    with _llm_clients_lock:
+        clients = list(_llm_clients.values())
+        _llm_clients.clear()
+
+    for llm in clients:
+        llm.http_client.close()
+        await llm.http_async_client.aclose()
+
+
+def prompt_fingerprint(api_key: str, model_name: str, prompt_text: str, **params) -> str:
+    """Fingerprint of everything that determines a completion (the API key is included so tenants never share)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (api_key, model_name, repr(sorted(params.items())), prompt_text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def complete(api_key: str, prompt_text: str, model_name: str = config.MODEL_NAME, **params) -> str:
+    """
+    Get the completion text for a prompt, sharing one call between identical concurrent prompts
+
+    Args:
+        api_key: The Groq API key for LLM access
+        prompt_text: The full prompt
+        model_name: The Groq model to use
+        **params: Extra ChatGroq parameters (e.g. temperature)
+
+    Returns:
+        The completion text
+    """
+    llm = get_llm(api_key, model_name, **params)
+    if not config.LLM_COALESCE_ENABLED:
+        return llm.invoke(prompt_text).content
+
+    key = prompt_fingerprint(api_key, model_name, prompt_text, **params)
+    return LLM_SINGLEFLIGHT.do(key, lambda: llm.invoke(prompt_text).content)
+
+
+async def acomplete(api_key: str, prompt_text: str, model_name: str = config.MODEL_NAME, **params) -> str:
+    """Async version of complete"""
+    llm = get_llm(api_key, model_name, **params)
+    if not config.LLM_COALESCE_ENABLED:
+        return (await llm.ainvoke(prompt_text)).content
+
+    async def call() -> str:
+        return (await llm.ainvoke(prompt_text)).content
+
+    key = prompt_fingerprint(api_key, model_name, prompt_text, **params)
+    return await LLM_ASYNC_SINGLEFLIGHT.do(key, call)
+
+
+def llm_coalescing_stats() -> Dict[str, Any]:
+    """Upstream LLM calls and requests that shared one, for blocking and async callers"""
+    return {
+        "enabled": config.LLM_COALESCE_ENABLED,
+        "sync": LLM_SINGLEFLIGHT.stats(),
+        "async": LLM_ASYNC_SINGLEFLIGHT.stats(),
+    }
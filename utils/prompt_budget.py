@@ -0,0 +1,220 @@
+import bisect
+import logging
+import re
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+import config
+
+
+logger = logging.getLogger(__name__)
+
+# Words, numbers and single punctuation marks
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|[0-9]+|[^\sA-Za-z0-9]")
+
+# Histogram bucket upper bounds, in tokens
+TOKEN_BUCKETS = [32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384]
+
+PROMPT_SECTIONS = ["system", "history", "user", "total"]
+
+# First line of a history that starts with the rolling conversation summary (see utils.summary_memory)
+HISTORY_SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local token estimate, close to BPE tokenizers for English and Pidgin
+
+    Every word, number and punctuation mark counts as one token, and long
+    words as one token per 6 characters.
+    """
+    return sum((len(piece) + 5) // 6 for piece in _TOKEN_PATTERN.findall(text))
+
+
+def _tiktoken_counter() -> Callable[[str], int]:
+    import tiktoken
+
+    encoding = tiktoken.get_encoding("cl100k_base")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+TOKENIZERS: Dict[str, Callable[[], Callable[[str], int]]] = {
+    "estimate": lambda: estimate_tokens,
+    "chars": lambda: lambda text: (len(text) + 3) // 4,
+    "tiktoken": _tiktoken_counter,
+}
+
+_count_tokens: Optional[Callable[[str], int]] = None
+
+
+def set_tokenizer(tokenizer: Callable[[str], int]) -> None:
+    """Use a different token counter (any callable from text to a token count)"""
+    global _count_tokens
+    _count_tokens = tokenizer
+    _count_system_tokens.cache_clear()
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with the configured tokenizer (config.PROMPT_TOKENIZER)"""
+    global _count_tokens
+    if _count_tokens is None:
+        try:
+            _count_tokens = TOKENIZERS[config.PROMPT_TOKENIZER]()
+        except (KeyError, ImportError) as e:
+            print(f"Tokenizer {config.PROMPT_TOKENIZER!r} is unavailable ({str(e)}), using the local estimate")
+            _count_tokens = estimate_tokens
+    return _count_tokens(text)
+
+
+@lru_cache(maxsize=256)
+def _count_system_tokens(system_prompt: str) -> int:
+    # System prompts are compiled once per business type, so count each one once
+    return count_tokens(system_prompt)
+
+
+class TokenHistogram:
+    """Counts of values per bucket, plus count, sum and max"""
+
+    def __init__(self, buckets: List[int] = TOKEN_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def observe(self, value: int) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def snapshot(self) -> Dict[str, object]:
+        labels = [f"<={bound}" for bound in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 1) if self.count else 0.0,
+            "max": self.max,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class PromptTokenStats:
+    """Per-section prompt token histograms and history-trimming counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {section: TokenHistogram() for section in PROMPT_SECTIONS}
+        self.trimmed_prompts = 0
+        self.trimmed_tokens = 0
+        self.last_prompt: Dict[str, int] = {}
+
+    def record(self, sections: Dict[str, int], trimmed_tokens: int) -> None:
+        with self._lock:
+            for section, tokens in sections.items():
+                self.histograms[section].observe(tokens)
+            if trimmed_tokens:
+                self.trimmed_prompts += 1
+                self.trimmed_tokens += trimmed_tokens
+            self.last_prompt = dict(sections, trimmed=trimmed_tokens)
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "max_prompt_tokens": config.PROMPT_MAX_TOKENS,
+                "tokenizer": config.PROMPT_TOKENIZER,
+                "sections": {section: histogram.snapshot() for section, histogram in self.histograms.items()},
+                "trimmed_prompts": self.trimmed_prompts,
+                "trimmed_tokens": self.trimmed_tokens,
+                "last_prompt": self.last_prompt,
+            }
+
+
+PROMPT_TOKEN_STATS = PromptTokenStats()
+
+
+def _shorten_summary(summary_line: str, budget: int) -> Tuple[str, int]:
+    """Keep as many leading words of the summary line as fit the budget; returns (line, tokens)"""
+    words = summary_line[len(HISTORY_SUMMARY_PREFIX):].split(" ")
+    # Binary search for the most words that fit
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(HISTORY_SUMMARY_PREFIX + " ".join(words[:middle])) + 1 <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    if not low:
+        return "", 0
+    line = HISTORY_SUMMARY_PREFIX + " ".join(words[:low])
+    return line, count_tokens(line) + 1
+
+
+def _trim_history(history: str, history_budget: int) -> Tuple[str, int]:
+    """
+    Drop the oldest history lines until it fits the budget; returns (history, tokens)
+
+    A leading conversation summary stands for everything before the verbatim
+    turns, so it is kept and the oldest turns after it go first. It is only
+    shortened once no verbatim turn is left to drop.
+    """
+    if history_budget <= 0:
+        return "", 0
+    lines = history.split("\n")
+    line_tokens = [count_tokens(line) + 1 for line in lines]
+    total = sum(line_tokens)
+    first = 1 if lines[0].startswith(HISTORY_SUMMARY_PREFIX) else 0
+    start = first
+    while start < len(lines) and total > history_budget:
+        total -= line_tokens[start]
+        start += 1
+    kept = lines[start:]
+    if first:
+        summary_line = lines[0]
+        if total > history_budget:
+            summary_line, summary_tokens = _shorten_summary(summary_line, history_budget)
+            total = summary_tokens
+        if summary_line:
+            kept.insert(0, summary_line)
+    return "\n".join(kept), total
+
+
+def build_budgeted_prompt(system_prompt: str, history: str, user_input: str, max_tokens: Optional[int] = None) -> Tuple[str, Dict[str, int]]:
+    """
+    Assemble the prompt, trimming conversation history to stay under the token ceiling
+
+    Args:
+        system_prompt: Zita's system prompt
+        history: Conversation history from memory (may be empty)
+        user_input: The customer's message
+        max_tokens: Hard ceiling for the whole prompt (defaults to config.PROMPT_MAX_TOKENS)
+
+    Returns:
+        (prompt_text, token counts per section: system, history, user, total)
+    """
+    max_tokens = max_tokens or config.PROMPT_MAX_TOKENS
+    user_text = f"Customer: {user_input}\nZita:"
+    system_tokens = _count_system_tokens(system_prompt)
+    user_tokens = count_tokens(user_text)
+    history_tokens = count_tokens(history) if history else 0
+
+    # The history is the only section that can give way
+    trimmed = 0
+    if history and system_tokens + history_tokens + user_tokens > max_tokens:
+        original_tokens = history_tokens
+        history, history_tokens = _trim_history(history, max_tokens - system_tokens - user_tokens)
+        trimmed = original_tokens - history_tokens
+
+    if history:
+        prompt_text = f"{system_prompt}\n\n{history}\n{user_text}"
+    else:
+        prompt_text = f"{system_prompt}\n\n{user_text}"
+
+    sections = {
+        "system": system_tokens,
+        "history": history_tokens,
+        "user": user_tokens,
+        "total": system_tokens + history_tokens + user_tokens,
+    }
+    PROMPT_TOKEN_STATS.record(sections, trimmed)
+    logger.debug("Prompt tokens %s (trimmed %d history tokens)", sections, trimmed)
+    return prompt_text, sections
@@ -0,0 +1,113 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import config
+
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s.!?,;:]+$")
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation ("Hi!! " -> "hi")"""
+    return _TRAILING_PUNCTUATION.sub("", _WHITESPACE.sub(" ", text.strip().lower()))
+
+
+def conversation_state_hash(memory=None) -> str:
+    """Fingerprint of the conversation so far (empty for a new conversation)"""
+    history = memory.buffer if memory is not None and hasattr(memory, "buffer") else ""
+    if not history:
+        return ""
+    return hashlib.blake2b(str(history).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ttl seconds"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 600, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Like get, but without counting a hit or miss or refreshing the entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                return None
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+class ResponseCache(TTLCache):
+    """
+    Cache of raw LLM completions for repeated customer questions
+
+    Entries are keyed by business type, normalized customer text and the
+    conversation state, so "Hi!" on a new conversation for the same business
+    is answered without calling the LLM. Completions that ask for a
+    stateful tool (e.g. negotiation) are never stored.
+    """
+
+    def key(self, business_key: str, user_input: str, memory=None) -> Tuple[str, str, str]:
+        return business_key, normalize_text(user_input), conversation_state_hash(memory)
+
+    def store(self, key: Tuple[str, str, str], completion: str, function_calls: List[Dict[str, Any]]) -> None:
+        """Cache a completion unless one of its function calls is stateful"""
+        if any(function_call.get("intent") in config.RESPONSE_CACHE_BYPASS_INTENTS for function_call in function_calls):
+            return
+        self.put(key, completion)
+
+
+RESPONSE_CACHE = ResponseCache(
+    max_entries=config.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl=config.RESPONSE_CACHE_TTL
+)
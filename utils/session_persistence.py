@@ -0,0 +1,257 @@
+import json
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from langchain_core.messages import message_to_dict, messages_from_dict
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS session_items (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS session_items_session ON session_items (session_id, seq);
+"""
+INSERT_SQL = "INSERT INTO session_items (session_id, kind, payload) VALUES (?, ?, ?)"
+DELETE_SQL = "DELETE FROM session_items WHERE session_id = ?"
+LOAD_SQL = "SELECT kind, payload FROM session_items WHERE session_id = ? ORDER BY seq"
+COUNT_SQL = "SELECT COUNT(*) FROM session_items WHERE session_id = ?"
+
+
+def _memory_messages(memory) -> List[Any]:
+    chat_memory = getattr(memory, "chat_memory", None)
+    return chat_memory.messages if chat_memory is not None else []
+
+
+def _summary_state(memory) -> Optional[Tuple[str, int]]:
+    # Rolling summary memory folds old turns into a summary; plain memory has none
+    if not hasattr(memory, "summarized_count"):
+        return None
+    return memory.summary, memory.summarized_count
+
+
+class SQLiteSessionPersistence:
+    """
+    Write-behind persistence of chat sessions in SQLite
+
+    Sessions are append-only: after a turn, the new chat messages, function
+    call log entries and memory messages are queued in memory and a
+    background thread writes them in batches, one transaction per flush.
+    A chat turn never waits on the disk. Sessions are read back (rehydrated)
+    when a worker first needs one it doesn't hold, or when its stored row
+    count no longer matches what this worker wrote (another worker added
+    turns or cleared it). Rows still queued by another worker are only seen
+    once that worker flushes them.
+
+    Anything still queued when the process is killed is lost, so at most
+    flush_interval seconds of turns can be lost on a crash.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.5, batch_size: int = 500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._local = threading.local()
+        self._pending: List[Tuple[str, str, Optional[str]]] = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # Odd while a flush is writing; readers use it to tell whether queued rows are in the database yet
+        self._write_generation = 0
+        # session_id -> how many messages, log entries and memory messages are already persisted
+        self._offsets: Dict[str, Tuple[int, int, int]] = {}
+        # session_id -> last (summary, summarized_count) persisted
+        self._summaries: Dict[str, Optional[Tuple[str, int]]] = {}
+        # session_id -> rows stored for the session as far as this worker knows (written or queued)
+        self._row_counts: Dict[str, int] = {}
+        self._wake = threading.Event()
+        self._closed = False
+        self._writer: Optional[threading.Thread] = None
+        self.flushes = 0
+        self.rows_written = 0
+
+        self.connection.executescript(SCHEMA)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection to the database"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _enqueue(self, rows: List[Tuple[str, str, Optional[str]]]) -> None:
+        with self._pending_lock:
+            self._pending.extend(rows)
+            pending = len(self._pending)
+        if self._writer is None:
+            self._start_writer()
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def _start_writer(self) -> None:
+        with self._flush_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run_writer, name="session-writer", daemon=True)
+                self._writer.start()
+
+    def _run_writer(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def record(self, session_id: str, session: Dict[str, Any]) -> None:
+        """Queue whatever was added to a session since it was last recorded"""
+        messages, log, memory = self._offsets.get(session_id, (0, 0, 0))
+        memory_messages = _memory_messages(session["memory"])
+
+        rows = [(session_id, "message", json.dumps(message)) for message in session["messages"][messages:]]
+        rows += [(session_id, "log", json.dumps(entry)) for entry in session["function_call_log"][log:]]
+        rows += [(session_id, "memory", json.dumps(message_to_dict(message))) for message in memory_messages[memory:]]
+        # Only the latest summary matters; a new one is stored whenever it moves
+        summary = _summary_state(session["memory"])
+        if summary is not None and summary != self._summaries.get(session_id) and summary[1]:
+            rows.append((session_id, "summary", json.dumps({"summary": summary[0], "summarized_count": summary[1]})))
+        self._summaries[session_id] = summary
+        self._offsets[session_id] = (len(session["messages"]), len(session["function_call_log"]), len(memory_messages))
+        if rows:
+            self._row_counts[session_id] = self._row_counts.get(session_id, 0) + len(rows)
+            self._enqueue(rows)
+
+    def reset(self, session_id: str) -> None:
+        """Queue the removal of a session's stored history"""
+        self._offsets[session_id] = (0, 0, 0)
+        self._summaries.pop(session_id, None)
+        self._row_counts[session_id] = 0
+        self._enqueue([(session_id, "reset", None)])
+
+    def forget(self, session_id: str) -> None:
+        """Stop tracking a session this worker no longer holds (its history stays stored)"""
+        self._offsets.pop(session_id, None)
+        self._summaries.pop(session_id, None)
+        self._row_counts.pop(session_id, None)
+
+    def _queued_rows(self, session_id: str) -> List[Tuple[str, Optional[str]]]:
+        return [(kind, payload) for queued_id, kind, payload in self._pending if queued_id == session_id]
+
+    def _read_with_queue(self, session_id: str, sql: str, attempts: int = 3) -> Optional[Tuple[list, list]]:
+        """
+        Read a session's stored rows plus this worker's queued rows, without waiting on the writer
+
+        Returns None if a flush kept overlapping the read (its rows may be counted twice or not at all).
+        """
+        for _ in range(attempts):
+            with self._pending_lock:
+                generation = self._write_generation
+                queued = self._queued_rows(session_id)
+            if generation % 2:
+                continue
+            # This thread's own connection; in WAL mode a read never waits on the writer's commit
+            stored = self.connection.execute(sql, (session_id,)).fetchall()
+            with self._pending_lock:
+                if self._write_generation == generation:
+                    return stored, queued
+        return None
+
+    def is_current(self, session_id: str) -> bool:
+        """Whether the stored rows of a session are still the ones this worker wrote or loaded"""
+        rows = self._read_with_queue(session_id, COUNT_SQL)
+        if rows is None:
+            # The writer is busy; the next access checks again
+            return True
+        stored = rows[0][0][0]
+        for kind, _ in rows[1]:
+            stored = 0 if kind == "reset" else stored + 1
+        return stored == self._row_counts.get(session_id, 0)
+
+    def flush(self) -> None:
+        """Write everything queued so far in one transaction"""
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, []
+                if not pending:
+                    return
+                self._write_generation += 1
+
+            try:
+                with self.connection:
+                    inserts = []
+                    for session_id, kind, payload in pending:
+                        if kind == "reset":
+                            # Keep the order: write earlier rows before deleting
+                            self.connection.executemany(INSERT_SQL, inserts)
+                            inserts = []
+                            self.connection.execute(DELETE_SQL, (session_id,))
+                        else:
+                            inserts.append((session_id, kind, payload))
+                    self.connection.executemany(INSERT_SQL, inserts)
+            finally:
+                with self._pending_lock:
+                    self._write_generation += 1
+            self.flushes += 1
+            self.rows_written += len(pending)
+
+    def load(self, session_id: str, session_factory: Callable[[], Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Rebuild a stored session, or return None if it was never stored"""
+        # Read the database and this worker's queued rows together, without writing anything here
+        read = self._read_with_queue(session_id, LOAD_SQL)
+        if read is None:
+            # A flush kept overlapping the read; wait for it rather than miss or repeat rows
+            with self._flush_lock:
+                read = self._read_with_queue(session_id, LOAD_SQL)
+        rows = read[0] + read[1]
+
+        messages, log, memory_messages, summary = [], [], [], None
+        row_count = 0
+        for kind, payload in rows:
+            if kind == "reset":
+                messages, log, memory_messages, summary = [], [], [], None
+                row_count = 0
+                continue
+            row_count += 1
+            if kind == "message":
+                messages.append(json.loads(payload))
+            elif kind == "log":
+                log.append(json.loads(payload))
+            elif kind == "memory":
+                memory_messages.append(json.loads(payload))
+            elif kind == "summary":
+                summary = json.loads(payload)
+        if not row_count:
+            # Nothing stored (or cleared by another worker): start over from empty
+            self.forget(session_id)
+            return None
+
+        session = session_factory()
+        session["messages"].extend(messages)
+        session["function_call_log"].extend(log)
+        memory = session["memory"]
+        if memory_messages:
+            memory.chat_memory.add_messages(messages_from_dict(memory_messages))
+        if summary is not None and hasattr(memory, "summarized_count"):
+            memory.summary = summary["summary"]
+            memory.summarized_count = min(summary["summarized_count"], len(memory_messages))
+
+        self._offsets[session_id] = (len(messages), len(log), len(memory_messages))
+        self._summaries[session_id] = _summary_state(memory)
+        self._row_counts[session_id] = row_count
+        return session
+
+    def close(self) -> None:
+        """Stop the writer and write whatever is still queued"""
+        self._closed = True
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {"pending_rows": pending, "flushes": self.flushes, "rows_written": self.rows_written}
@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+import config
+from utils.summary_memory import create_conversation_memory
+
+
+# Rough fixed cost of a session (dicts, memory object) on top of its text
+SESSION_BASE_BYTES = 1024
+
+
+def new_session() -> Dict[str, Any]:
+    """An empty chat session"""
+    return {
+        "messages": [],
+        "memory": create_conversation_memory(),
+        "function_call_log": []
+    }
+
+
+def estimate_session_bytes(session: Dict[str, Any]) -> int:
+    """Approximate memory held by a session, from the text it stores"""
+    size = SESSION_BASE_BYTES
+    size += sum(len(message["content"]) for message in session["messages"])
+    size += sum(len(entry) for entry in session["function_call_log"])
+    buffer = getattr(session["memory"], "buffer", "")
+    size += len(buffer) if isinstance(buffer, str) else sum(len(str(message)) for message in buffer)
+    return size
+
+
+class SessionStore:
+    """
+    Bounded store of chat sessions
+
+    Sessions are kept in least-recently-used order. A session that hasn't
+    been touched for idle_ttl seconds expires, and the least recently used
+    sessions are evicted once there are more than max_sessions or their
+    approximate size goes over max_bytes.
+
+    With a persistence backend, every change is recorded after a turn and a
+    session this store doesn't hold (evicted, expired or never seen by this
+    worker) is rehydrated from it on first use. A session it does hold is
+    re-read when the stored copy has moved on (another worker changed it).
+    Both read the database, so async code should call these from a thread.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        idle_ttl: float = 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+        session_factory: Callable[[], Dict[str, Any]] = new_session,
+        clock: Callable[[], float] = time.monotonic,
+        persistence: Optional[Any] = None
+    ):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.session_factory = session_factory
+        self.clock = clock
+        self.persistence = persistence
+
+        # session_id -> (session, last access time, accounted bytes), oldest first
+        self._sessions: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rehydrations = 0
+        self.resyncs = 0
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id, count=False) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str, count: bool = True) -> Optional[Dict[str, Any]]:
+        """Return a live session and mark it as recently used, or None"""
+        with self._lock:
+            self._expire_idle()
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                if count:
+                    self.hits += 1
+                entry[1] = self.clock()
+                self._sessions.move_to_end(session_id)
+            elif count:
+                self.misses += 1
+
+        if self.persistence is None:
+            return entry[0] if entry is not None else None
+        if entry is not None:
+            if self.persistence.is_current(session_id):
+                return entry[0]
+            # Another worker added turns to (or cleared) this session since we read it
+            return self._rehydrate(session_id, stale=entry[0])
+        return self._rehydrate(session_id)
+
+    def _rehydrate(self, session_id: str, stale: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        session = self.persistence.load(session_id, self.session_factory)
+        with self._lock:
+            # Another request may have rehydrated it in the meantime
+            entry = self._sessions.get(session_id)
+            if entry is not None and entry[0] is not stale:
+                return entry[0]
+            if session is None:
+                if entry is not None:
+                    # Cleared by another worker
+                    self._sessions.pop(session_id)
+                    self.total_bytes -= entry[2]
+                return None
+            if stale is not None:
+                self.resyncs += 1
+            else:
+                self.rehydrations += 1
+        return self._insert(session_id, session)
+
+    def get_or_create(self, session_id: str) -> Dict[str, Any]:
+        """Return a session, creating it (and evicting others if needed) when it doesn't exist"""
+        session = self.get(session_id)
+        if session is not None:
+            return session
+        return self._insert(session_id, self.session_factory())
+
+    def reset(self, session_id: str) -> Dict[str, Any]:
+        """Replace a session with an empty one"""
+        session = self._insert(session_id, self.session_factory())
+        if self.persistence is not None:
+            self.persistence.reset(session_id)
+        return session
+
+    def _insert(self, session_id: str, session: Dict[str, Any]) -> Dict[str, Any]:
+        size = estimate_session_bytes(session)
+        with self._lock:
+            previous = self._sessions.pop(session_id, None)
+            if previous is not None:
+                self.total_bytes -= previous[2]
+            self._sessions[session_id] = [session, self.clock(), size]
+            self.total_bytes += size
+            self._evict(keep=session_id)
+        return session
+
+    def account(self, session_id: str) -> None:
+        """Re-measure a session after it changed (e.g. after a chat turn)"""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return
+            size = estimate_session_bytes(entry[0])
+            self.total_bytes += size - entry[2]
+            entry[2] = size
+            self._evict(keep=session_id)
+        if self.persistence is not None:
+            self.persistence.record(session_id, entry[0])
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry is not None:
+                self.total_bytes -= entry[2]
+        if self.persistence is not None:
+            self.persistence.reset(session_id)
+
+    def _drop(self, session_id: str, entry: list) -> None:
+        self.total_bytes -= entry[2]
+        if self.persistence is not None:
+            self.persistence.forget(session_id)
+
+    def _expire_idle(self) -> None:
+        # The oldest sessions are at the front, so stop at the first live one
+        deadline = self.clock() - self.idle_ttl
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if entry[1] > deadline:
+                break
+            self._sessions.popitem(last=False)
+            self._drop(session_id, entry)
+            self.expirations += 1
+
+    def _evict(self, keep: str) -> None:
+        self._expire_idle()
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or self.total_bytes > self.max_bytes):
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                # Never evict the session that is in use; move it out of the way
+                self._sessions.move_to_end(session_id)
+                continue
+            entry = self._sessions.pop(session_id)
+            self._drop(session_id, entry)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit/miss/eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            "sessions": len(self._sessions),
+            "bytes": self.total_bytes,
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "idle_ttl": self.idle_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "rehydrations": self.rehydrations,
+            "resyncs": self.resyncs,
+            "persistence": self.persistence.stats() if self.persistence is not None else None,
+        }
+
+    def close(self) -> None:
+        """Write out anything the persistence backend still has queued"""
+        if self.persistence is not None:
+            self.persistence.close()
+
+
+def create_session_store() -> SessionStore:
+    """Session store sized from config, persisted to config.SESSION_DB_PATH if it is set"""
+    persistence = None
+    if config.SESSION_DB_PATH:
+        from utils.session_persistence import SQLiteSessionPersistence
+        persistence = SQLiteSessionPersistence(
+            config.SESSION_DB_PATH,
+            flush_interval=config.SESSION_FLUSH_INTERVAL,
+            batch_size=config.SESSION_FLUSH_BATCH_SIZE
+        )
+    return SessionStore(
+        max_sessions=config.SESSION_MAX_COUNT,
+        idle_ttl=config.SESSION_IDLE_TTL,
+        max_bytes=config.SESSION_MAX_BYTES,
+        persistence=persistence
+    )
@@ -0,0 +1,173 @@
+import asyncio
+import threading
+import time
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+
+
+class _FlightStats:
+    """Counters and the recent-results window shared by both singleflight variants"""
+
+    def __init__(self, window: float = 0.0, max_waiters: int = 0, clock: Callable[[], float] = time.monotonic):
+        # Seconds a finished call's result is still handed to new callers (0: only while in flight)
+        self.window = window
+        # Most callers that can wait on one call; later callers make their own (0: no limit)
+        self.max_waiters = max_waiters
+        self.clock = clock
+        self._recent: Dict[Hashable, Tuple[float, Any]] = {}
+        self.calls = 0
+        self.shared = 0
+        self.overflow = 0
+
+    def _recent_result(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._recent.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] <= self.clock():
+            self._recent.pop(key, None)
+            return False, None
+        return True, entry[1]
+
+    def _remember(self, key: Hashable, result: Any) -> None:
+        if self.window <= 0:
+            return
+        now = self.clock()
+        # Drop expired results so keys that never come back don't pile up
+        for expired in [k for k, (expires, _) in self._recent.items() if expires <= now]:
+            del self._recent[expired]
+        self._recent[key] = (now + self.window, result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "overflow": self.overflow,
+            "in_flight": len(self._calls),
+            "window": self.window,
+            "max_waiters": self.max_waiters,
+        }
+
+
+class SingleFlight(_FlightStats):
+    """
+    Collapse concurrent calls with the same key into one
+
+    The first caller for a key runs the function; callers arriving while it
+    runs (or within window seconds after it succeeded) get the same result
+    (or exception) instead of making their own call.
+    """
+
+    def __init__(self, window: float = 0.0, max_waiters: int = 0, clock: Callable[[], float] = time.monotonic):
+        super().__init__(window, max_waiters, clock)
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        with self._lock:
+            found, result = self._recent_result(key)
+            if found:
+                self.shared += 1
+                return result
+            call = self._calls.get(key)
+            if call is not None and (not self.max_waiters or call.waiters < self.max_waiters):
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            elif call is not None:
+                # Too many callers already waiting on this key
+                self.overflow += 1
+                self.calls += 1
+                return function()
+            else:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = function()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                    if call.error is None:
+                        self._remember(key, call.result)
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class _AsyncCall:
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        # Callers that joined after the first one (bounded by max_waiters)
+        self.waiters = 0
+        # Callers currently awaiting the task; when the last one gives up, the task is cancelled
+        self.awaiting = 0
+
+
+class AsyncSingleFlight(_FlightStats):
+    """
+    SingleFlight for coroutines: concurrent awaits of the same key share one call
+
+    The call runs as its own task, so cancelling any caller (the first one
+    included) doesn't cancel it for the others; it is only cancelled once
+    every caller waiting on it has been cancelled.
+    """
+
+    def __init__(self, window: float = 0.0, max_waiters: int = 0, clock: Callable[[], float] = time.monotonic):
+        super().__init__(window, max_waiters, clock)
+        self._calls: Dict[Hashable, _AsyncCall] = {}
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        found, result = self._recent_result(key)
+        if found:
+            self.shared += 1
+            return result
+
+        call = self._calls.get(key)
+        if call is not None:
+            if self.max_waiters and call.waiters >= self.max_waiters:
+                # Too many callers already waiting on this key
+                self.overflow += 1
+                self.calls += 1
+                return await function()
+            call.waiters += 1
+            self.shared += 1
+        else:
+            call = self._calls[key] = _AsyncCall(asyncio.ensure_future(function()))
+            call.task.add_done_callback(partial(self._finish, key, call))
+            self.calls += 1
+
+        call.awaiting += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.awaiting -= 1
+            if not call.awaiting and not call.task.done():
+                # Every caller was cancelled: nobody needs the result any more
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call.task.cancel()
+
+    def _finish(self, key: Hashable, call: _AsyncCall, task: "asyncio.Task") -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if task.cancelled():
+            return
+        # Retrieving the exception also keeps asyncio from logging it when nobody was waiting
+        if task.exception() is None:
+            self._remember(key, task.result())
@@ -0,0 +1,260 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Runs of characters that need no special handling inside a JSON string
+_PLAIN_STRING_CHARS = re.compile(r'[^"\\]+')
+
+# Single-character JSON string escapes
+_JSON_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t"
+}
+
+
+class LLMResponseStreamParser:
+    """
+    Incrementally extract Zita's JSON envelope from a streamed LLM completion
+
+    The envelope looks like {"response_to_user": "...", "function_call": {...} | null},
+    or has a "function_calls": [{...}, ...] list instead of function_call.
+    Feed completion chunks as they arrive; each call returns the events that became
+    available:
+        ("text", str): new characters of the response_to_user value
+        ("function_call", dict): a function call object, as soon as it closes
+
+    Prose before or after the JSON is skipped, and objects that don't contain the
+    envelope keys (e.g. braces in prose) are ignored. Every character is looked at
+    once, so parsing is linear in the length of the completion.
+    """
+
+    def __init__(self):
+        self._text_parts: List[str] = []
+        self.response_complete = False
+        self.function_call: Optional[Dict[str, Any]] = None
+        self.function_calls: List[Dict[str, Any]] = []
+        self.complete = False
+
+        # JSON structure state
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._seen_keys = set()
+
+        # Top-level key/value state
+        self._expect_key = False
+        self._reading_key = False
+        self._key_chars: List[str] = []
+        self._current_key: Optional[str] = None
+        self._expect_value = False
+
+        # response_to_user string decoding state
+        self._streaming_text = False
+        self._unicode_digits: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+
+        # function call object capture state (one object, or each object of the function_calls list)
+        self._capturing = False
+        self._capture_chars: List[str] = []
+        self._capture_depth = 1
+        self._in_call_list = False
+
+    @property
+    def response_text(self) -> str:
+        """The response_to_user text decoded so far"""
+        if len(self._text_parts) > 1:
+            self._text_parts = ["".join(self._text_parts)]
+        return self._text_parts[0] if self._text_parts else ""
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume the next chunk of the completion and return new events"""
+        events: List[Tuple[str, Any]] = []
+        text_chars: List[str] = []
+        pos = 0
+        length = len(chunk)
+
+        while pos < length and not self.complete:
+            # Skip prose until the next object starts
+            if self._depth == 0:
+                brace = chunk.find("{", pos)
+                if brace == -1:
+                    break
+                self._open_envelope()
+                pos = brace + 1
+                continue
+
+            if self._streaming_text:
+                pos = self._read_text(chunk, pos, text_chars)
+                continue
+
+            char = chunk[pos]
+            pos += 1
+
+            if self._capturing:
+                self._capture_chars.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._reading_key:
+                        self._finish_key()
+                elif self._reading_key:
+                    self._key_chars.append(char)
+                continue
+
+            if char.isspace():
+                continue
+
+            if self._depth == 1 and self._expect_value:
+                self._expect_value = False
+                if char == '"' and self._current_key == "response_to_user":
+                    self._streaming_text = True
+                    continue
+                if char == "{" and self._current_key == "function_call":
+                    self._start_capture(char)
+                elif char == "[" and self._current_key == "function_calls":
+                    self._in_call_list = True
+            elif self._in_call_list and self._depth == 2 and char == "{" and not self._capturing:
+                self._start_capture(char)
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._expect_key = False
+                    self._reading_key = True
+                    self._key_chars = []
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._capturing and self._depth == self._capture_depth:
+                    self._finish_function_call(events, text_chars)
+                elif self._in_call_list and self._depth == 1:
+                    self._in_call_list = False
+                if self._depth == 0:
+                    self._close_envelope()
+            elif char == ":" and self._depth == 1:
+                self._expect_value = True
+            elif char == "," and self._depth == 1:
+                self._expect_key = True
+
+        if text_chars:
+            self._emit_text(events, text_chars)
+        return events
+
+    def _open_envelope(self) -> None:
+        """Start tracking a new top-level object"""
+        self._depth = 1
+        self._expect_key = True
+        self._seen_keys = set()
+
+    def _close_envelope(self) -> None:
+        """Finish a top-level object, or go back to scanning if it wasn't the envelope"""
+        if self._seen_keys & {"response_to_user", "function_call", "function_calls"}:
+            self.complete = True
+        self._expect_key = False
+        self._expect_value = False
+
+    def _finish_key(self) -> None:
+        """Record a completed top-level key"""
+        self._reading_key = False
+        self._current_key = "".join(self._key_chars)
+        self._seen_keys.add(self._current_key)
+
+    def _read_text(self, chunk: str, pos: int, text_chars: List[str]) -> int:
+        """Decode response_to_user characters from chunk[pos:] and return the new position"""
+        if self._unicode_digits is not None:
+            while pos < len(chunk) and len(self._unicode_digits) < 4:
+                self._unicode_digits += chunk[pos]
+                pos += 1
+            if len(self._unicode_digits) == 4:
+                self._decode_unicode(text_chars)
+            return pos
+
+        if self._escape:
+            self._escape = False
+            char = chunk[pos]
+            if char == "u":
+                self._unicode_digits = ""
+            else:
+                text_chars.append(_JSON_ESCAPES.get(char, char))
+            return pos + 1
+
+        match = _PLAIN_STRING_CHARS.match(chunk, pos)
+        if match:
+            text_chars.append(match.group(0))
+            return match.end()
+
+        char = chunk[pos]
+        if char == "\\":
+            self._escape = True
+        else:
+            # Closing quote of the response_to_user value
+            self._streaming_text = False
+            self.response_complete = True
+        return pos + 1
+
+    def _decode_unicode(self, text_chars: List[str]) -> None:
+        """Decode a completed \\uXXXX escape, pairing UTF-16 surrogates"""
+        try:
+            code = int(self._unicode_digits, 16)
+        except ValueError:
+            code = 0xFFFD
+        self._unicode_digits = None
+
+        if 0xD800 <= code < 0xDC00:
+            self._high_surrogate = code
+            return
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        text_chars.append(chr(code))
+
+    def _emit_text(self, events: List[Tuple[str, Any]], text_chars: List[str]) -> None:
+        """Flush decoded response_to_user characters as a text event"""
+        text = "".join(text_chars)
+        text_chars.clear()
+        if text:
+            self._text_parts.append(text)
+            events.append(("text", text))
+
+    def _start_capture(self, char: str) -> None:
+        """Start capturing a function call object at the current depth"""
+        self._capturing = True
+        self._capture_chars = [char]
+        self._capture_depth = self._depth
+
+    def _finish_function_call(self, events: List[Tuple[str, Any]], text_chars: List[str]) -> None:
+        """Parse the captured function call object and report it"""
+        self._capturing = False
+        try:
+            func_call = json.loads("".join(self._capture_chars))
+        except json.JSONDecodeError:
+            return
+
+        # Same validation as the parse_llm_response fallback
+        if not isinstance(func_call, dict) or "intent" not in func_call:
+            return
+        if "parameters" not in func_call or not isinstance(func_call["parameters"], dict):
+            func_call["parameters"] = {}
+        func_call = {"intent": func_call["intent"], "parameters": func_call["parameters"]}
+
+        # Keep event order faithful to the completion
+        if text_chars:
+            self._emit_text(events, text_chars)
+        if self.function_call is None:
+            self.function_call = func_call
+        self.function_calls.append(func_call)
+        events.append(("function_call", func_call))
+
@@ -0,0 +1,122 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from langchain.memory import ConversationBufferMemory
+from langchain_core.messages import BaseMessage, get_buffer_string
+from pydantic import Field, PrivateAttr
+import config
+from utils.prompt_budget import HISTORY_SUMMARY_PREFIX, count_tokens
+
+
+# Background pool that folds old turns into conversation summaries, off the request path
+SUMMARY_EXECUTOR = ThreadPoolExecutor(
+    max_workers=config.MEMORY_SUMMARY_WORKERS,
+    thread_name_prefix="memory-summary"
+)
+
+
+def summarize_with_llm(summary: str, transcript: str) -> str:
+    """Fold a transcript into the running summary with the LLM"""
+    from utils.llm_client import get_llm
+
+    prompt = f"""
+    Update the running summary of a conversation between a customer and Zita, a customer service agent.
+    Keep every product, price, order ID, discount code, offer and decision the customer made.
+    Reply with the updated summary only, in at most {config.MEMORY_SUMMARY_MAX_TOKENS} tokens.
+
+    Current summary:
+    {summary or "(none)"}
+
+    New conversation lines:
+    {transcript}
+    """
+    llm = get_llm(config.GROQ_API_KEY)
+    return llm.invoke(prompt).content.strip()
+
+
+class RollingSummaryMemory(ConversationBufferMemory):
+    """
+    Conversation memory that keeps the prompt history under a token budget
+
+    The last max_recent_turns turns are kept verbatim. Once the verbatim
+    history is over max_tokens, older turns are folded into a running
+    summary (which has its own budget, MEMORY_SUMMARY_MAX_TOKENS) by a
+    background job; until it finishes, the history simply still includes
+    those turns. Every message stays in chat_memory (for the session store
+    and persistence); only what goes into the prompt is summarized.
+    """
+
+    max_recent_turns: int = 4
+    max_tokens: int = 1500
+    summary: str = ""
+    # Messages already folded into the summary
+    summarized_count: int = 0
+    # (summary, transcript) -> new summary; defaults to summarize_with_llm
+    summarizer: Optional[Callable[[str, str], str]] = Field(default=None, exclude=True)
+
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _pending: Any = PrivateAttr(default=None)
+    # Bumped by clear() so a summary of the old conversation is thrown away
+    _generation: int = PrivateAttr(default=0)
+
+    @property
+    def buffer_as_str(self) -> str:
+        history = self._buffer_as_str(self.chat_memory.messages[self.summarized_count:])
+        if not self.summary:
+            return history
+        # One line, so prompt trimming can keep it while dropping the oldest turns
+        summary = " ".join(self.summary.split())
+        return f"{HISTORY_SUMMARY_PREFIX}{summary}\n{history}"
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        super().save_context(inputs, outputs)
+        self._maybe_summarize()
+
+    def clear(self) -> None:
+        super().clear()
+        with self._lock:
+            self.summary = ""
+            self.summarized_count = 0
+            self._generation += 1
+
+    def _maybe_summarize(self) -> None:
+        """Start a background summarization if the history is over budget"""
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                return
+            keep_from = len(self.chat_memory.messages) - 2 * self.max_recent_turns
+            if keep_from <= self.summarized_count:
+                return
+            # Only the turns not yet summarized count against the budget
+            verbatim = self._buffer_as_str(self.chat_memory.messages[self.summarized_count:])
+            if count_tokens(verbatim) <= self.max_tokens:
+                return
+            to_fold: List[BaseMessage] = self.chat_memory.messages[self.summarized_count:keep_from]
+            self._pending = SUMMARY_EXECUTOR.submit(self._summarize, self.summary, to_fold, keep_from, self._generation)
+
+    def _summarize(self, summary: str, messages: List[BaseMessage], keep_from: int, generation: int) -> None:
+        transcript = get_buffer_string(messages, human_prefix=self.human_prefix, ai_prefix=self.ai_prefix)
+        try:
+            new_summary = (self.summarizer or summarize_with_llm)(summary, transcript)
+        except Exception as e:
+            print(f"Error summarizing conversation: {str(e)}")
+            return
+        with self._lock:
+            # The memory may have been cleared while the summary was being written
+            if generation == self._generation and self.summarized_count < keep_from:
+                self.summary = new_summary
+                self.summarized_count = keep_from
+
+    def wait_for_summary(self, timeout: Optional[float] = None) -> None:
+        """Block until a running summarization finishes (for scripts and shutdown)"""
+        pending = self._pending
+        if pending is not None:
+            pending.result(timeout=timeout)
+
+
+def create_conversation_memory() -> RollingSummaryMemory:
+    """Conversation memory sized from config"""
+    return RollingSummaryMemory(
+        max_recent_turns=config.MEMORY_RECENT_TURNS,
+        max_tokens=config.MEMORY_TOKEN_BUDGET
+    )